@@ -0,0 +1,170 @@
+import json
+import logging
+import math
+import os
+
+import numpy as np
+from PIL import Image
+
+
+def trim_box(arr):
+    """Return (left, top, right, bottom) of the non-transparent pixels of an (H, W, 4) array.
+
+    Fully transparent frames give an empty box (0, 0, 0, 0).
+    """
+    opaque = arr[..., 3] > 0
+    rows = np.flatnonzero(opaque.any(axis=1))
+    if rows.size == 0:
+        return 0, 0, 0, 0
+    cols = np.flatnonzero(opaque.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+class SkylinePacker:
+    """Bottom-left skyline rectangle packer for a fixed atlas width.
+
+    The skyline is a list of [x, y, width] segments covering the atlas width;
+    each rectangle goes where its top edge ends lowest (leftmost on ties).
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.height = 0
+        self.skyline = [[0, 0, width]]
+
+    def _fit(self, index, width):
+        """y at which a rectangle of width can sit starting at segment index, or None."""
+        x = self.skyline[index][0]
+        if x + width > self.width:
+            return None
+        y = 0
+        remaining = width
+        while remaining > 0:
+            seg_x, seg_y, seg_w = self.skyline[index]
+            y = max(y, seg_y)
+            remaining -= seg_w
+            index += 1
+        return y
+
+    def insert(self, width, height):
+        """Place a width x height rectangle and return its (x, y)."""
+        best = None
+        for i in range(len(self.skyline)):
+            y = self._fit(i, width)
+            if y is not None and (best is None or y + height < best[0] + best[2]):
+                best = (y, i, height)
+        if best is None:
+            raise ValueError(f"Rectangle {width}x{height} does not fit in atlas width {self.width}")
+        y, i, _ = best
+        x = self.skyline[i][0]
+        self._add_segment(i, x, y + height, width)
+        self.height = max(self.height, y + height)
+        return x, y
+
+    def _add_segment(self, index, x, y, width):
+        self.skyline.insert(index, [x, y, width])
+        # Shrink or drop the segments now covered by the new one
+        i = index + 1
+        while i < len(self.skyline):
+            seg = self.skyline[i]
+            prev_end = self.skyline[i - 1][0] + self.skyline[i - 1][2]
+            if seg[0] >= prev_end:
+                break
+            shrink = prev_end - seg[0]
+            seg[0] += shrink
+            seg[2] -= shrink
+            if seg[2] > 0:
+                break
+            del self.skyline[i]
+        # Merge neighbours at the same height
+        i = 0
+        while i < len(self.skyline) - 1:
+            if self.skyline[i][1] == self.skyline[i + 1][1]:
+                self.skyline[i][2] += self.skyline.pop(i + 1)[2]
+            else:
+                i += 1
+
+
+def pack(sizes, padding=1, max_width=None):
+    """Pack (width, height) sizes; returns ([(x, y) per size], atlas_width, atlas_height).
+
+    Rectangles are inserted tallest first. Without max_width the atlas width
+    is about the square root of the total padded area.
+    """
+    padded = [(w + padding, h + padding) if w and h else (0, 0) for w, h in sizes]
+    area = sum(w * h for w, h in padded)
+    widest = max((w for w, _ in padded), default=0)
+    width = max_width or max(widest, int(math.ceil(math.sqrt(area * 1.15))), 1)
+    packer = SkylinePacker(width)
+    positions = [(0, 0)] * len(sizes)
+    for i in sorted(range(len(sizes)), key=lambda i: (-padded[i][1], -padded[i][0])):
+        if padded[i][0]:
+            positions[i] = packer.insert(*padded[i])
+    used_width = max((positions[i][0] + padded[i][0] for i in range(len(sizes)) if padded[i][0]), default=1)
+    return positions, max(used_width - padding, 1), max(packer.height - padding, 1)
+
+
+def unique_names(names):
+    """Return names with repeats made unique by a _2, _3, ... suffix before the extension."""
+    all_names = set(names)
+    taken = set()
+    result = []
+    for name in names:
+        if name in taken:
+            stem, ext = os.path.splitext(name)
+            k = 2
+            while f"{stem}_{k}{ext}" in all_names or f"{stem}_{k}{ext}" in taken:
+                k += 1
+            name = f"{stem}_{k}{ext}"
+        taken.add(name)
+        result.append(name)
+    return result
+
+
+def build_atlas(frames, names, sources=None, padding=1, max_width=None):
+    """Trim and pack PIL frames into one RGBA atlas image.
+
+    Returns (atlas image, metadata dict). The metadata follows the common
+    "hash" atlas layout: per frame name the packed rectangle, the trim offset
+    inside the original frame (spriteSourceSize), the original size and the
+    source file it came from. Repeated names (e.g. equal basenames from
+    different folders) are made unique with unique_names.
+    """
+    names = unique_names(names)
+    arrays = [np.asarray(frame.convert('RGBA')) for frame in frames]
+    boxes = [trim_box(arr) for arr in arrays]
+    sizes = [(right - left, bottom - top) for left, top, right, bottom in boxes]
+    positions, width, height = pack(sizes, padding, max_width)
+
+    atlas = np.zeros((height, width, 4), dtype=np.uint8)
+    meta_frames = {}
+    for i, (arr, (left, top, right, bottom), (x, y)) in enumerate(zip(arrays, boxes, positions)):
+        w, h = right - left, bottom - top
+        if w and h:
+            atlas[y:y + h, x:x + w] = arr[top:bottom, left:right]
+        meta_frames[names[i]] = {
+            'frame': {'x': x, 'y': y, 'w': w, 'h': h},
+            'rotated': False,
+            'trimmed': (w, h) != (arr.shape[1], arr.shape[0]),
+            'spriteSourceSize': {'x': left, 'y': top, 'w': w, 'h': h},
+            'sourceSize': {'w': arr.shape[1], 'h': arr.shape[0]},
+            'source': sources[i] if sources else None,
+            'index': i,
+        }
+    meta = {'frames': meta_frames, 'meta': {'size': {'w': width, 'h': height}, 'format': 'RGBA8888', 'scale': '1'}}
+    return Image.fromarray(atlas, 'RGBA'), meta
+
+
+def write_atlas(frames, names, image_path, sources=None, padding=1, max_width=None, compress_level=6, optimize=False):
+    """Build an atlas and write it as image_path plus a JSON frame map next to it.
+
+    Returns the JSON path.
+    """
+    atlas, meta = build_atlas(frames, names, sources, padding, max_width)
+    meta['meta']['image'] = os.path.basename(image_path)
+    atlas.save(image_path, compress_level=int(compress_level), optimize=bool(optimize))
+    json_path = os.path.splitext(image_path)[0] + '.json'
+    with open(json_path, 'w') as f:
+        json.dump(meta, f, indent=4)
+    logging.info(f"Atlas {atlas.size[0]}x{atlas.size[1]} with {len(frames)} frames saved to {image_path}")
+    return json_path
@@ -0,0 +1,117 @@
+"""Rough timings for the array-based save helpers (run: python benchmark.py)."""
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+import atlas
+import export
+
+
+def _loop_apply_transparency(frame, transparency_color, ttol):
+    # Per-pixel version NewToolApp._apply_transparency_to_frame used before
+    img = frame.convert('RGBA')
+    new_data = []
+    for item in img.getdata():
+        r, g, b = item[:3]
+        if abs(r - transparency_color[0]) <= ttol and abs(g - transparency_color[1]) <= ttol and abs(b - transparency_color[2]) <= ttol:
+            new_data.append((r, g, b, 0))
+        else:
+            new_data.append(item)
+    img.putdata(new_data)
+    return img
+
+
+def _loop_replace_transparent(frame, replacement_color):
+    # Per-pixel version NewToolApp._replace_transparent_pixels used before
+    img = frame.convert('RGBA')
+    pixels = img.load()
+    for y in range(img.height):
+        for x in range(img.width):
+            if pixels[x, y][3] == 0:
+                pixels[x, y] = replacement_color + (255,)
+    return img.convert('RGB')
+
+
+def _timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def bench_save_transparency(frame_count=300, size=(128, 128), ttol=8):
+    rng = np.random.default_rng(0)
+    colour = (255, 0, 255)
+    frames = []
+    for _ in range(frame_count):
+        arr = rng.integers(0, 256, (size[1], size[0], 4), dtype=np.uint8)
+        arr[..., 3] = 255
+        arr[rng.random(arr.shape[:2]) < 0.4, :3] = colour
+        frames.append(Image.fromarray(arr, 'RGBA'))
+
+    print(f"{frame_count} frames of {size[0]}x{size[1]}, tolerance {ttol}")
+    old = _timed("per-pixel loops", lambda: [
+        _loop_replace_transparent(_loop_apply_transparency(f, colour, ttol), (0, 0, 0)) for f in frames
+    ])
+    new = _timed("export.prepare_frames (stacked)", lambda: export.prepare_frames(frames, colour, ttol, (0, 0, 0)))
+    same = all(np.array_equal(np.asarray(a), np.asarray(b)) for a, b in zip(old, new))
+    print(f"identical output: {same}")
+
+
+def bench_parallel_save(frame_count=64, size=(256, 256), compress_level=6):
+    rng = np.random.default_rng(0)
+    frames = [Image.fromarray(rng.integers(0, 256, (size[1], size[0], 4), dtype=np.uint8), 'RGBA')
+              for _ in range(frame_count)]
+    print(f"\nSaving {frame_count} PNGs of {size[0]}x{size[1]} (compress_level {compress_level}, {os.cpu_count()} CPUs)")
+    with tempfile.TemporaryDirectory() as folder:
+        _timed("one by one", lambda: [
+            f.save(os.path.join(folder, f"serial_{i}.png"), compress_level=compress_level) for i, f in enumerate(frames)
+        ])
+        _timed("export.save_images (thread pool)", lambda: export.save_images(
+            ((f, os.path.join(folder, f"pool_{i}.png")) for i, f in enumerate(frames)), compress_level=compress_level
+        ))
+
+
+def bench_atlas_pack(frame_count=1000):
+    rng = np.random.default_rng(0)
+    sizes = [(int(rng.integers(8, 96)), int(rng.integers(8, 96))) for _ in range(frame_count)]
+    print(f"\nPacking {frame_count} trimmed frames")
+    positions, width, height = _timed("atlas.pack (skyline)", lambda: atlas.pack(sizes))
+    used = sum(w * h for w, h in sizes)
+    print(f"atlas {width}x{height}, {used / (width * height):.0%} filled")
+
+
+def bench_animation_deltas(frame_count=60, size=(192, 192)):
+    # A static background with a small moving sprite, like most pixel-art animations
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (size[1], size[0], 4), dtype=np.uint8)
+    background[..., 3] = 255
+    frames = []
+    for i in range(frame_count):
+        arr = background.copy()
+        x = (i * 3) % (size[0] - 16)
+        arr[40:56, x:x + 16] = (255, 0, 0, 255)
+        frames.append(Image.fromarray(arr, 'RGBA'))
+    print(f"\nAnimating {frame_count} frames of {size[0]}x{size[1]} with a 16x16 moving sprite")
+    with tempfile.TemporaryDirectory() as folder:
+        for label, path, write in [
+            ("PIL APNG (save_all)", "full.png", lambda p: frames[0].save(
+                p, save_all=True, append_images=frames[1:], duration=100, default_image=False, disposal=0, blend=0)),
+            ("export.write_apng (dirty rects)", "delta.png", lambda p: export.write_apng(frames, p)),
+            ("PIL WebP (full frames, lossless)", "full.webp", lambda p: frames[0].save(
+                p, save_all=True, append_images=frames[1:], duration=100, lossless=True)),
+            ("export.write_webp (dirty rects)", "delta.webp", lambda p: export.write_webp(frames, p)),
+        ]:
+            path = os.path.join(folder, path)
+            _timed(label, lambda: write(path))
+            print(f"{'':<40} {os.path.getsize(path) / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    bench_save_transparency()
+    bench_parallel_save()
+    bench_atlas_pack()
+    bench_animation_deltas()
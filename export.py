@@ -0,0 +1,516 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+from PIL import Image
+
+import resampling
+
+
+def make_color_transparent(arr, color, tolerance=0):
+    """Set alpha to 0 where RGB is within tolerance (per channel) of color, in place.
+
+    Works on an (H, W, 4) array or an (N, H, W, 4) stack. tolerance <= 0 means
+    an exact match, as in NewToolApp._apply_transparency_to_frame.
+    """
+    tolerance = max(int(tolerance), 0)
+    mask = None
+    for channel, value in enumerate(color[:3]):
+        # Compare uint8 channels against a clamped [lo, hi] range: no wide temporaries
+        plane = arr[..., channel]
+        within = (plane >= max(value - tolerance, 0)) & (plane <= min(value + tolerance, 255))
+        mask = within if mask is None else mask & within
+    arr[..., 3][mask] = 0
+    return arr
+
+
+def replace_transparent(arr, color):
+    """Return the RGB part of an RGBA array/stack with fully transparent pixels set to color."""
+    rgb = arr[..., :3].copy()
+    rgb[arr[..., 3] == 0] = color[:3]
+    return rgb
+
+
+def iter_prepared(frames, transparency_color=None, tolerance=0, replacement_color=None):
+    """Yield (index, PIL image) with the save-time transparency steps applied, one stack per frame size.
+
+    Pixels matching transparency_color become transparent; with
+    replacement_color set, fully transparent pixels are then filled with it
+    and the frame becomes RGB. Frames come out group by group, so saving can
+    start before every size has been prepared.
+    """
+    for indices, stack in iter_stacks(frames, writable=bool(transparency_color)):
+        if transparency_color:
+            make_color_transparent(stack, transparency_color, tolerance)
+        if replacement_color is not None:
+            out, mode = replace_transparent(stack, replacement_color), 'RGB'
+        else:
+            out, mode = stack, 'RGBA'
+        for i, arr in zip(indices, out):
+            yield i, Image.fromarray(arr, mode)
+
+
+def prepare_frames(frames, transparency_color=None, tolerance=0, replacement_color=None):
+    """List version of iter_prepared: PIL images in the original order."""
+    prepared = [None] * len(frames)
+    for i, image in iter_prepared(frames, transparency_color, tolerance, replacement_color):
+        prepared[i] = image
+    return prepared
+
+
+def iter_stacks(frames, writable=False):
+    """Yield (indices, (N, H, W, 4) uint8 stack) for each group of equal-size frames.
+
+    Disk-backed frames (see FrameStore.stacks) are yielded as their mapped
+    buckets; pass writable when the caller edits the stacks in place, so
+    those are copied rather than written back to the frames."""
+    mapped = frames.stacks() if hasattr(frames, 'stacks') else None
+    if mapped is not None:
+        for indices, stack in mapped.values():
+            yield indices, stack.copy() if writable else stack
+        return
+    for indices in resampling.group_by_size(frames).values():
+        yield indices, np.stack([np.asarray(frames[i].convert('RGBA')) for i in indices])
+
+
+def to_indexed(image, palette_handler, transparency_color=None):
+    """Convert an RGBA frame whose colours come from palette_handler's palette to an indexed P image.
+
+    Indices come from the handler's colour lookup (the one used when the
+    palette was applied) and keep the palette order; no new quantization is
+    done. Fully transparent pixels get one extra palette entry (coloured
+    transparency_color) that is marked transparent, which PNG writes as a
+    tRNS chunk; with a full 256-colour palette an entry no opaque pixel of
+    the frame uses is marked instead (transparency_color's own entry if it
+    is free). Returns None when the frame cannot be stored losslessly
+    (colours outside the palette, partial alpha, or every index in use).
+    """
+    palette = np.asarray(palette_handler.palette_colors, dtype=np.uint8)
+    arr = np.asarray(image.convert('RGBA'))
+    alpha = arr[..., 3]
+    if ((alpha != 0) & (alpha != 255)).any():
+        return None
+    indices = palette_handler.palette_indices(arr[..., :3])
+    opaque = alpha == 255
+    if not np.array_equal(palette[indices[opaque]], arr[..., :3][opaque]):
+        return None
+    transparent_index = None
+    if not opaque.all():
+        if len(palette) < 256:
+            transparent_index = len(palette)
+            palette = np.vstack([palette, np.asarray([(transparency_color or (0, 0, 0))[:3]], dtype=np.uint8)])
+        else:
+            used = np.zeros(len(palette), dtype=bool)
+            used[indices[opaque]] = True
+            free = np.flatnonzero(~used)
+            if not free.size:
+                return None
+            transparent_index = int(free[0])
+            if transparency_color is not None:
+                same = free[(palette[free] == np.asarray(transparency_color[:3], dtype=np.uint8)).all(axis=1)]
+                if same.size:
+                    transparent_index = int(same[0])
+        indices = np.where(opaque, indices, transparent_index)
+    indexed = Image.fromarray(indices.astype(np.uint8), 'P')
+    indexed.putpalette(palette.tobytes())
+    if transparent_index is not None:
+        indexed.info['transparency'] = transparent_index
+    return indexed
+
+
+def png_save_kwargs(path, compress_level=6, optimize=False):
+    """Encoder options for path: PNG gets compress_level/optimize, other formats PIL defaults."""
+    if os.path.splitext(path)[1].lower() != '.png':
+        return {}
+    return {'compress_level': int(compress_level), 'optimize': bool(optimize)}
+
+
+class ExportManifest:
+    """Content hashes of the files a previous export wrote into a folder.
+
+    Stored as MANIFEST_NAME in the output folder: {filename: {digest: hash
+    of the frame's final pixels plus its encode settings, mtime_ns, size}}.
+    A file is skipped only if its hash matches and it still has the recorded
+    mtime and size, so files rewritten since (by a save without the manifest
+    or by another tool) are written again. prune() deletes only files this
+    manifest recorded, that the current export did not produce and that are
+    untouched since they were recorded.
+    """
+
+    MANIFEST_NAME = '.export_manifest.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, self.MANIFEST_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.entries = {}
+        self._seen = set()
+
+    @staticmethod
+    def digest(image, settings):
+        """Hash of the image's mode, size and pixels plus the encode settings."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps([image.mode, image.size, settings, image.info.get('transparency')], sort_keys=True).encode())
+        if image.mode == 'P':
+            h.update(bytes(image.getpalette() or []))
+        h.update(image.tobytes())
+        return h.hexdigest()
+
+    def _untouched(self, name, entry):
+        """True if the file of entry still has the mtime and size recorded when it was written."""
+        try:
+            st = os.stat(os.path.join(self.folder, name))
+        except OSError:
+            return False
+        return isinstance(entry, dict) and entry.get('mtime_ns') == st.st_mtime_ns and entry.get('size') == st.st_size
+
+    def unchanged(self, path, digest):
+        """True if path was written by a previous export with the same digest and is untouched since."""
+        name = os.path.relpath(path, self.folder)
+        with self._lock:
+            self._seen.add(name)
+            entry = self.entries.get(name)
+        return isinstance(entry, dict) and entry.get('digest') == digest and self._untouched(name, entry)
+
+    def record(self, path, digest):
+        name = os.path.relpath(path, self.folder)
+        st = os.stat(path)
+        with self._lock:
+            self._seen.add(name)
+            self.entries[name] = {
+                'digest': digest, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size
+            }
+
+    def prune(self):
+        """Delete recorded files this export did not produce and that are untouched since
+        they were written; forget entries whose file is gone or was changed. Returns the count."""
+        deleted = 0
+        for name in [n for n in self.entries if n not in self._seen]:
+            if self._untouched(name, self.entries[name]):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                    deleted += 1
+                except OSError as e:
+                    logging.warning(f"Could not delete stale export file {name}: {e}")
+                    continue
+            del self.entries[name]
+        return deleted
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({'files': self.entries}, f, indent=1, sort_keys=True)
+
+
+def save_images(jobs, compress_level=6, optimize=False, workers=None, max_in_flight=None,
+                progress=None, cancelled=None, incremental=False, prune=False):
+    """Save (PIL image, path) pairs from an iterable in a thread pool.
+
+    zlib releases the GIL, so PNG encoding runs on several cores. At most
+    max_in_flight saves are queued at once: the jobs iterable (typically a
+    generator preparing frames) is only advanced when a slot frees up, which
+    keeps memory bounded and overlaps preparation with encoding.
+    progress(done) is called after each finished file and cancelled() is
+    polled before each new save.
+
+    With incremental set, an ExportManifest in the output folder is used to
+    skip frames whose pixels and settings are unchanged since the last
+    export. Every written file is recorded in the folder's manifest if it
+    has one, so the manifest never vouches for a file it did not write.
+    With prune set (and the save not cancelled), files the manifest recorded
+    earlier that this save did not produce are deleted (ExportManifest.prune).
+    Returns {'written', 'skipped', 'deleted'}.
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    max_in_flight = max_in_flight or workers * 2
+    counts = {'written': 0, 'skipped': 0, 'deleted': 0}
+    manifests = {}
+
+    def save(image, path):
+        kwargs = png_save_kwargs(path, compress_level, optimize)
+        manifest = manifests.get(os.path.dirname(path))
+        if manifest is None:
+            image.save(path, **kwargs)
+            return 'written'
+        digest = manifest.digest(image, [os.path.splitext(path)[1].lower(), kwargs])
+        if incremental and manifest.unchanged(path, digest):
+            return 'skipped'
+        image.save(path, **kwargs)
+        manifest.record(path, digest)
+        return 'written'
+
+    def collect(finished):
+        for future in finished:
+            counts[future.result()] += 1  # result() re-raises encoder errors
+            if progress:
+                progress(counts['written'] + counts['skipped'])
+
+    pending = set()
+    completed = False
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for image, path in jobs:
+                if cancelled and cancelled():
+                    break
+                folder = os.path.dirname(path)
+                if folder not in manifests and (incremental or prune or
+                                                os.path.exists(os.path.join(folder, ExportManifest.MANIFEST_NAME))):
+                    manifests[folder] = ExportManifest(folder)
+                if len(pending) >= max_in_flight:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending.add(pool.submit(save, image, path))
+            else:
+                completed = True
+            collect(wait(pending).done)
+    finally:
+        for manifest in manifests.values():
+            if completed and prune:
+                counts['deleted'] += manifest.prune()
+            manifest.save()
+    return counts
+
+
+def _pack_rgb(rgb):
+    """Pack (..., 3) uint8 RGB into uint32 0xRRGGBB keys."""
+    return (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+
+
+def _unpack_rgb(keys):
+    return np.stack([(keys >> 16) & 255, (keys >> 8) & 255, keys & 255], axis=-1).astype(np.uint8)
+
+
+def _nearest_palette_index(colors, palette, chunk=65536):
+    """Index of the nearest palette colour (squared RGB distance) for each of (K, 3) colors."""
+    palette = palette.astype(np.int32)
+    out = np.empty(len(colors), dtype=np.intp)
+    for start in range(0, len(colors), chunk):
+        block = colors[start:start + chunk].astype(np.int32)
+        distances = ((block[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+        out[start:start + chunk] = np.argmin(distances, axis=1)
+    return out
+
+
+def build_global_palette(arrays, max_colors=256, alpha_threshold=128):
+    """Build one palette for a whole animation from a single histogram pass.
+
+    arrays are (H, W, 4) uint8 RGBA frames (any sizes). Pixels with alpha
+    below alpha_threshold are transparent. Returns (palette, keys, indices,
+    transparent): palette is (P, 3) uint8, keys/indices a sorted lookup from
+    packed 0xRRGGBB to palette index for every opaque colour in the frames,
+    and transparent tells whether index 0 is reserved for transparency (the
+    palette then starts with a placeholder at index 0).
+    """
+    opaque = [_pack_rgb(arr[..., :3])[arr[..., 3] >= alpha_threshold] for arr in arrays]
+    transparent = any(arr.size and (arr[..., 3] < alpha_threshold).any() for arr in arrays)
+    keys, counts = np.unique(np.concatenate(opaque) if opaque else np.empty(0, np.uint32), return_counts=True)
+    slots = max_colors - 1 if transparent else max_colors
+
+    if len(keys) <= slots:
+        # Few enough colours: exact palette, most frequent first
+        order = np.argsort(-counts, kind='stable')
+        colors = _unpack_rgb(keys[order])
+        indices = np.empty(len(keys), dtype=np.intp)
+        indices[order] = np.arange(len(keys))
+    else:
+        # Median cut over the colour histogram (each colour once, weighted by count)
+        weighted = np.repeat(_unpack_rgb(keys), np.minimum(counts, 64), axis=0)
+        sample = Image.fromarray(weighted[None, :, :], 'RGB')
+        quantized = sample.quantize(colors=slots, method=Image.Quantize.MEDIANCUT)
+        colors = np.array(quantized.getpalette()[:slots * 3], dtype=np.uint8).reshape(-1, 3)
+        indices = _nearest_palette_index(_unpack_rgb(keys), colors)
+
+    if transparent:
+        colors = np.vstack([np.zeros((1, 3), dtype=np.uint8), colors])
+        indices = indices + 1
+    return colors, keys, indices, transparent
+
+
+def write_gif(frames, path, duration=100, loop=0, transparency_color=None, alpha_threshold=128):
+    """Save PIL frames as an animated GIF with one global palette.
+
+    The palette comes from build_global_palette over all frames; index 0 is
+    reserved for transparent pixels (shown as transparency_color by viewers
+    that ignore transparency) and every frame is mapped through the same
+    precomputed colour lookup, so no per-frame quantization happens and the
+    output is deterministic.
+    """
+    arrays = [np.asarray(frame.convert('RGBA')) for frame in frames]
+    palette, keys, indices, transparent = build_global_palette(arrays, alpha_threshold=alpha_threshold)
+    if transparent and transparency_color:
+        palette[0] = transparency_color[:3]
+
+    images = []
+    for arr in arrays:
+        pos = np.searchsorted(keys, _pack_rgb(arr[..., :3]))
+        index = indices[np.minimum(pos, max(len(keys) - 1, 0))] if len(keys) else np.zeros(arr.shape[:2], np.intp)
+        if transparent:
+            index = np.where(arr[..., 3] < alpha_threshold, 0, index)
+        image = Image.fromarray(index.astype(np.uint8), 'P')
+        image.putpalette(palette.tobytes())
+        images.append(image)
+
+    save_kwargs = dict(save_all=True, append_images=images[1:], optimize=False, duration=duration, loop=loop)
+    if transparent:
+        # Clear each frame before drawing the next so transparent areas stay transparent
+        save_kwargs.update(transparency=0, disposal=2)
+    images[0].save(path, **save_kwargs)
+    return path
+
+
+def dirty_rects(arrays):
+    """Bounding box (left, top, right, bottom) of the pixels that changed from the previous frame.
+
+    arrays are equal-size (H, W, 4) uint8 frames; the first frame's box is
+    the whole canvas and an unchanged frame gets None. The diff of the
+    whole sequence is computed at once.
+    """
+    height, width = arrays[0].shape[:2]
+    rects = [(0, 0, width, height)]
+    if len(arrays) < 2:
+        return rects
+    # One uint32 compare per RGBA pixel
+    packed = np.ascontiguousarray(np.stack(arrays)).view(np.uint32)[..., 0]
+    changed = packed[1:] != packed[:-1]
+    rows_changed = changed.any(axis=2)
+    cols_changed = changed.any(axis=1)
+    for rows, cols in zip(rows_changed, cols_changed):
+        ys, xs = np.flatnonzero(rows), np.flatnonzero(cols)
+        rects.append((int(xs[0]), int(ys[0]), int(xs[-1]) + 1, int(ys[-1]) + 1) if ys.size else None)
+    return rects
+
+
+def _delta_frames(frames, duration, even_offsets=False):
+    """Yield (region array, left, top, duration) for each stored frame of an animation.
+
+    Unchanged frames are merged into the previous one by extending its
+    duration; changed frames carry only their dirty rectangle.
+    """
+    arrays = [np.asarray(frame.convert('RGBA')) for frame in frames]
+    if len({arr.shape for arr in arrays}) != 1:
+        raise ValueError("All frames of an animation must have the same size")
+    pending = None
+    for arr, rect in zip(arrays, dirty_rects(arrays)):
+        if rect is None:
+            pending[3] += duration
+            continue
+        if pending is not None:
+            yield tuple(pending)
+        left, top, right, bottom = rect
+        if even_offsets:
+            left, top = left & ~1, top & ~1
+        pending = [arr[top:bottom, left:right], left, top, duration]
+    yield tuple(pending)
+
+
+def _png_chunks(data):
+    """Split an encoded PNG into (type, body) chunks."""
+    chunks = []
+    pos = 8
+    while pos < len(data):
+        length, = struct.unpack('>I', data[pos:pos + 4])
+        chunks.append((data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]))
+        pos += 12 + length
+    return chunks
+
+
+def _png_chunk(chunk_type, body):
+    return struct.pack('>I', len(body)) + chunk_type + body + struct.pack('>I', zlib.crc32(chunk_type + body) & 0xffffffff)
+
+
+def write_apng(frames, path, duration=100, loop=0, compress_level=6):
+    """Save PIL frames as an animated PNG storing only each frame's dirty rectangle.
+
+    Every region is encoded by PIL as an RGBA PNG and its IDAT data reused
+    as fdAT. Regions use blend op SOURCE and dispose op NONE, so each one
+    simply replaces its pixels (alpha included) on the canvas.
+    """
+    stored = list(_delta_frames(frames, duration))
+    out = [b'\x89PNG\r\n\x1a\n']
+    sequence = 0
+    for n, (region, left, top, delay) in enumerate(stored):
+        buf = io.BytesIO()
+        Image.fromarray(np.ascontiguousarray(region), 'RGBA').save(buf, 'PNG', compress_level=int(compress_level))
+        chunks = _png_chunks(buf.getvalue())
+        if n == 0:
+            out.append(_png_chunk(b'IHDR', chunks[0][1]))
+            out.append(_png_chunk(b'acTL', struct.pack('>II', len(stored), loop)))
+        height, width = region.shape[:2]
+        out.append(_png_chunk(b'fcTL', struct.pack(
+            '>IIIIIHHBB', sequence, width, height, left, top, min(delay, 65535), 1000, 0, 0
+        )))
+        sequence += 1
+        for chunk_type, body in chunks:
+            if chunk_type != b'IDAT':
+                continue
+            if n == 0:
+                out.append(_png_chunk(b'IDAT', body))
+            else:
+                out.append(_png_chunk(b'fdAT', struct.pack('>I', sequence) + body))
+                sequence += 1
+    out.append(_png_chunk(b'IEND', b''))
+    with open(path, 'wb') as f:
+        f.write(b''.join(out))
+    logging.info(f"APNG with {len(stored)} stored frame(s) of {len(frames)} saved to {path}")
+    return path
+
+
+def _riff_chunks(data):
+    """Split a RIFF/WEBP file into (type, body) chunks."""
+    chunks = []
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_type = data[pos:pos + 4]
+        length, = struct.unpack('<I', data[pos + 4:pos + 8])
+        chunks.append((chunk_type, data[pos + 8:pos + 8 + length]))
+        pos += 8 + length + (length & 1)
+    return chunks
+
+
+def _riff_chunk(chunk_type, body):
+    return chunk_type + struct.pack('<I', len(body)) + body + (b'\x00' if len(body) & 1 else b'')
+
+
+def _uint24(value):
+    return struct.pack('<I', value)[:3]
+
+
+def write_webp(frames, path, duration=100, loop=0, lossless=True, quality=80):
+    """Save PIL frames as an animated WebP storing only each frame's dirty rectangle.
+
+    Each region is encoded by PIL as a still WebP and its bitstream wrapped
+    in an ANMF chunk at the region offset (rounded down to even, as WebP
+    requires), with "do not blend" and no disposal so it replaces its pixels.
+    """
+    stored = list(_delta_frames(frames, duration, even_offsets=True))
+    height, width = frames[0].height, frames[0].width
+    body = [
+        _riff_chunk(b'VP8X', bytes([0x10 | 0x02, 0, 0, 0]) + _uint24(width - 1) + _uint24(height - 1)),
+        _riff_chunk(b'ANIM', struct.pack('<IH', 0, loop)),
+    ]
+    for region, left, top, delay in stored:
+        buf = io.BytesIO()
+        Image.fromarray(np.ascontiguousarray(region), 'RGBA').save(buf, 'WEBP', lossless=lossless, quality=quality)
+        frame_data = b''.join(
+            _riff_chunk(chunk_type, data) for chunk_type, data in _riff_chunks(buf.getvalue())
+            if chunk_type in (b'ALPH', b'VP8 ', b'VP8L')
+        )
+        region_height, region_width = region.shape[:2]
+        header = (_uint24(left // 2) + _uint24(top // 2) + _uint24(region_width - 1) + _uint24(region_height - 1)
+                  + _uint24(min(delay, 0xFFFFFF)) + bytes([0x02]))
+        body.append(_riff_chunk(b'ANMF', header + frame_data))
+    payload = b'WEBP' + b''.join(body)
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', len(payload)) + payload)
+    logging.info(f"Animated WebP with {len(stored)} stored frame(s) of {len(frames)} saved to {path}")
+    return path
@@ -0,0 +1,120 @@
+import atexit
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+# Rows a new size bucket starts with; buckets double when full
+INITIAL_CAPACITY = 16
+
+_session_folder = None
+_file_ids = itertools.count()
+
+
+def session_folder():
+    """Temporary folder for the memory-mapped stacks of this run, removed at exit."""
+    global _session_folder
+    if _session_folder is None:
+        _session_folder = tempfile.mkdtemp(prefix='spritescaler_frames_')
+        atexit.register(shutil.rmtree, _session_folder, True)
+    return _session_folder
+
+
+class MappedFrameStack:
+    """Frames kept on disk in memory-mapped .npy files, one (N, H, W, 4) uint8 stack per frame size.
+
+    The OS page cache decides what stays resident, so a session can hold more
+    frames than fit in RAM. view(i) is a zero-copy (H, W, 4) view into the
+    stack, stacks() gives whole buckets for batch kernels, and indexing returns
+    RGBA PIL images sharing the mapped memory (read-only, PIL copies on write).
+    append/extend grow a bucket by doubling it, so a batch job can write its
+    results as it produces them.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder or session_folder()
+        self._buckets = {}  # (width, height) -> [memmap, rows used, file path]
+        self._slots = []    # per frame: ((width, height), row)
+
+    def _new_file(self, size, capacity):
+        path = os.path.join(self.folder, f"frames_{size[0]}x{size[1]}_{next(_file_ids)}.npy")
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                         shape=(capacity, size[1], size[0], 4)), path
+
+    def append(self, frame):
+        """Add a PIL image or (H, W, 4) uint8 array as the last frame."""
+        arr = frame if isinstance(frame, np.ndarray) else np.asarray(frame.convert('RGBA'))
+        size = (arr.shape[1], arr.shape[0])
+        bucket = self._buckets.get(size)
+        if bucket is None:
+            array, path = self._new_file(size, INITIAL_CAPACITY)
+            bucket = self._buckets[size] = [array, 0, path]
+        elif bucket[1] == len(bucket[0]):
+            old, used, old_path = bucket
+            new, path = self._new_file(size, used * 2)
+            new[:used] = old[:used]
+            bucket[:] = [new, used, path]
+            del old
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass  # still mapped elsewhere (e.g. Windows); removed with the session folder
+        bucket[0][bucket[1]] = arr
+        self._slots.append((size, bucket[1]))
+        bucket[1] += 1
+
+    def extend(self, frames):
+        for frame in frames:
+            self.append(frame)
+
+    def view(self, i):
+        size, row = self._slots[i]
+        return self._buckets[size][0][row]
+
+    def image(self, i):
+        return Image.fromarray(self.view(i), 'RGBA')
+
+    def stacks(self, start=0, stop=None):
+        """{(width, height): (frame indices, (N, H, W, 4) view)} of frames start:stop like
+        resampling.stack_frames (indices count from start), without copying.
+
+        A bucket's rows are in frame order, so each size's frames in the range
+        are one contiguous run of rows."""
+        stop = len(self._slots) if stop is None else min(stop, len(self._slots))
+        groups = {}
+        for i in range(start, stop):
+            size, row = self._slots[i]
+            groups.setdefault(size, []).append((i - start, row))
+        return {size: ([i for i, _ in rows], self._buckets[size][0][rows[0][1]:rows[-1][1] + 1])
+                for size, rows in groups.items()}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.image(j) for j in range(*i.indices(len(self)))]
+        return self.image(i)
+
+    def __setitem__(self, i, frame):
+        arr = frame if isinstance(frame, np.ndarray) else np.asarray(frame.convert('RGBA'))
+        self.view(i)[...] = arr  # raises if the size differs
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.image(i)
+
+    def close(self):
+        """Drop the mapped files (views already handed out keep their mapping alive)."""
+        for array, _, path in self._buckets.values():
+            del array
+            try:
+                os.remove(path)
+            except OSError:
+                logging.debug(f"Frame stack file {path} still in use; removed at exit")
+        self._buckets.clear()
+        self._slots.clear()
@@ -0,0 +1,248 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+import loader
+from frame_stack import MappedFrameStack
+
+# Decoded frames a DecodeCache keeps (the app shares one) before the least recently used are dropped
+DEFAULT_BYTE_BUDGET = 512 * 1024 * 1024
+# Frames decoded ahead on each side of the one being shown
+PREFETCH_RADIUS = 2
+
+
+class DecodeCache:
+    """LRU of decoded RGBA frames keyed by (path, frame index), bounded by a byte budget.
+
+    transform(frame) (e.g. palette mapping) is applied once per decode and must
+    return a new RGBA image without side effects, since evicted frames are
+    decoded again; clear() the cache when its result would change. With a
+    loader.DiskDecodeCache, frames are sliced from its memory-mapped stacks
+    (a file is decoded once, on its first miss). Otherwise the last opened GIF
+    stays open so that playing it forwards only decodes each frame once
+    instead of seeking from the start every time.
+    """
+
+    def __init__(self, byte_budget=DEFAULT_BYTE_BUDGET, transform=None, disk_cache=None):
+        self.byte_budget = byte_budget
+        self.transform = transform
+        self.disk_cache = disk_cache
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._gif = None  # (path, open image)
+
+    def get(self, path, index):
+        key = (path, index)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                return frame
+            frame = self._decode(path, index)
+            self._frames[key] = frame
+            self._bytes += frame.width * frame.height * 4
+            while self._bytes > self.byte_budget and len(self._frames) > 1:
+                _, old = self._frames.popitem(last=False)
+                self._bytes -= old.width * old.height * 4
+            return frame
+
+    def contains(self, path, index):
+        with self._lock:
+            return (path, index) in self._frames
+
+    def _decode(self, path, index):
+        if self.disk_cache is not None:
+            stack = loader.decoded_stack(path, self.disk_cache)
+            frame = Image.fromarray(stack[index or 0], 'RGBA')
+        elif index is None:
+            with Image.open(path) as img:
+                frame = img.convert('RGBA')
+        else:
+            if self._gif is None or self._gif[0] != path or self._gif[1].tell() > index:
+                self.close()
+                self._gif = (path, Image.open(path))
+            img = self._gif[1]
+            img.seek(index)
+            frame = img.copy().convert('RGBA')
+        if self.transform is not None:
+            frame = self.transform(frame)
+        return frame
+
+    def close(self):
+        with self._lock:
+            if self._gif is not None:
+                self._gif[1].close()
+                self._gif = None
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+            self.close()
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+
+class FrameRef:
+    """One frame of a FrameStore: an image held in memory, a frame of a
+    MappedFrameStack, or a file frame decoded on demand."""
+    __slots__ = ('image', 'path', 'index', 'size', 'cache', 'stack')
+
+    def __init__(self, image=None, path=None, index=None, size=None, cache=None, stack=None):
+        self.image = image
+        self.path = path
+        self.index = index  # GIF frame index (None for single-image files) or stack row
+        self.size = size if size is not None else (image.size if image is not None else None)
+        self.cache = cache  # DecodeCache of file frames
+        self.stack = stack
+
+    def load(self):
+        if self.image is not None:
+            return self.image
+        if self.stack is not None:
+            return self.stack.image(self.index)
+        return self.cache.get(self.path, self.index)
+
+    def cached(self):
+        return self.image is not None or self.stack is not None or self.cache.contains(self.path, self.index)
+
+    @property
+    def source(self):
+        """The original path entry used when saving: path, (path, index) for GIF frames, or None."""
+        if self.path is None:
+            return None
+        return (self.path, self.index) if self.index is not None else self.path
+
+
+class FrameStore:
+    """List-like sequence of RGBA frames for FrameViewer.
+
+    Frames loaded from files are kept as (path, frame index, size) and decoded
+    on access through their DecodeCache, so only recently used frames take
+    memory; edited frames are held as images. Indexing returns PIL images
+    (treat them as read-only, copy before drawing on them), slicing returns a
+    list and len()/iteration work like on a list. copy() is cheap: the copy
+    shares the frame references and caches.
+    """
+
+    def __init__(self, refs=None):
+        self._refs = list(refs or [])
+        self._prefetch_target = None
+        self._prefetch_thread = None
+
+    @classmethod
+    def from_images(cls, images):
+        return cls([FrameRef(image=image.convert('RGBA')) for image in images])
+
+    @classmethod
+    def from_sources(cls, sources, sizes=None, cache=None):
+        """Lazy frames for save-path entries (path or (path, GIF frame index)) decoded through cache."""
+        cache = cache if cache is not None else DecodeCache()
+        refs = []
+        for i, source in enumerate(sources):
+            path, index = source if isinstance(source, tuple) else (source, None)
+            refs.append(FrameRef(path=path, index=index, size=sizes[i] if sizes else None, cache=cache))
+        return cls(refs)
+
+    @classmethod
+    def from_mapped(cls, stack):
+        """Frames of a MappedFrameStack (or a sheet.Sheet), read through zero-copy views."""
+        return cls([FrameRef(index=i, stack=stack) for i in range(len(stack))])
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ref.load() for ref in self._refs[i]]
+        return self._refs[i].load()
+
+    def __setitem__(self, i, image):
+        self._refs[i] = FrameRef(image=image.convert('RGBA'))
+
+    def __iter__(self):
+        for ref in self._refs:
+            yield ref.load()
+
+    def copy(self):
+        return FrameStore(self._refs)
+
+    def window(self, start, stop):
+        """Frames start:stop as a FrameStore sharing their references (unlike slicing, which decodes)."""
+        return FrameStore(self._refs[start:stop])
+
+    def stacks(self):
+        """MappedFrameStack.stacks() of the frames when they are consecutive rows of one
+        MappedFrameStack (e.g. the result of a disk-backed batch job), else None.
+
+        Batch kernels then read the mapped buckets directly instead of building
+        a stack frame by frame (see resampling.stack_frames)."""
+        stack = self._refs[0].stack if self._refs else None
+        if not isinstance(stack, MappedFrameStack):
+            return None
+        first = self._refs[0].index
+        if any(ref.stack is not stack or ref.index != first + i for i, ref in enumerate(self._refs)):
+            return None
+        return stack.stacks(first, first + len(self._refs))
+
+    def mapped_stacks(self):
+        """The MappedFrameStacks the frames are read from."""
+        return {ref.stack for ref in self._refs if isinstance(ref.stack, MappedFrameStack)}
+
+    def extend(self, other):
+        """Append the frames of another FrameStore (sharing its references), a MappedFrameStack or a list of images."""
+        if isinstance(other, MappedFrameStack):
+            other = FrameStore.from_mapped(other)
+        if isinstance(other, FrameStore):
+            self._refs.extend(other._refs)
+        else:
+            self._refs.extend(FrameRef(image=image.convert('RGBA')) for image in other)
+
+    def map_held(self, func):
+        """Copy of the store with func applied to the frames held in memory or in a stack.
+
+        Frames decoded from files are shared unchanged: their DecodeCache
+        applies its transform when they are decoded."""
+        return FrameStore([ref if ref.cache is not None else FrameRef(image=func(ref.load()))
+                           for ref in self._refs])
+
+    def sources(self):
+        """Save-path entries of every frame (None for frames not loaded from a file)."""
+        return [ref.source for ref in self._refs]
+
+    def size(self, i):
+        """(width, height) of frame i, decoding it only if the size is not known yet."""
+        ref = self._refs[i]
+        if ref.size is None and ref.stack is not None:
+            ref.size = ref.stack.view(ref.index).shape[1::-1]
+        if ref.size is None:
+            ref.size = ref.load().size
+        return ref.size
+
+    def prefetch(self, center, radius=PREFETCH_RADIUS):
+        """Decode the neighbours of frame center in a background thread (next frames first)."""
+        n = len(self._refs)
+        if n < 2:
+            return
+        self._prefetch_target = [self._refs[(center + d) % n] for step in range(1, radius + 1) for d in (step, -step)]
+        if self._prefetch_thread is None or not self._prefetch_thread.is_alive():
+            self._prefetch_thread = threading.Thread(target=self._prefetch_worker, daemon=True)
+            self._prefetch_thread.start()
+
+    def _prefetch_worker(self):
+        while self._prefetch_target:
+            refs, self._prefetch_target = self._prefetch_target, None
+            for ref in refs:
+                if self._prefetch_target:
+                    break  # the viewer moved on, start again around the new frame
+                if not ref.cached():
+                    try:
+                        ref.load()
+                    except Exception as e:
+                        logging.debug(f"Prefetch of {ref.path} frame {ref.index} failed: {e}")
+
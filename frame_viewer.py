@@ -3,6 +3,8 @@ from tkinter import ttk
 from PIL import Image, ImageTk
 import logging
 import sys # Import sys for platform check
+from frame_stack import MappedFrameStack
+from frame_store import FrameStore
 
 class FrameViewer(ttk.Frame):
     def set_image_paths(self, image_paths):
@@ -15,7 +17,7 @@ class FrameViewer(ttk.Frame):
         
     def __init__(self, parent):
         super().__init__(parent)
-        self.frames = []
+        self.frames = FrameStore()  # List-like; file frames are decoded on demand
         self.current_frame_index = 0
         self.animation_running = False
         self.resize_after_id = None  # For debouncing resize events
@@ -196,9 +198,14 @@ class FrameViewer(ttk.Frame):
         return self.display_info
 
     def load_frames(self, frames):
-        """Load new frames and display the first one."""
+        """Load new frames (a FrameStore, used as is, a MappedFrameStack or a list of images) and display the first one."""
         try:
-            self.frames = [f.convert('RGBA') for f in frames] # Ensure all frames are RGBA
+            if isinstance(frames, FrameStore):
+                self.frames = frames
+            elif isinstance(frames, MappedFrameStack):
+                self.frames = FrameStore.from_mapped(frames)
+            else:
+                self.frames = FrameStore.from_images(frames) # Ensure all frames are RGBA
             self.current_frame_index = 0
             # Reset zoom to 100% when loading new frames
             self.zoom_level = 100
@@ -233,6 +240,20 @@ class FrameViewer(ttk.Frame):
         except Exception as e:
             logging.error(f"Error loading frames: {e}")
 
+    def append_frames(self, frames, image_paths=None):
+        """Add frames (FrameStore, MappedFrameStack or images) at the end without resetting the view."""
+        was_empty = not self.frames
+        self.frames.extend(frames)
+        paths = list(image_paths) if image_paths else [None] * (len(self.frames) - len(getattr(self, '_image_paths', [])))
+        self._image_paths = list(getattr(self, '_image_paths', [])) + paths
+        if was_empty:
+            self.current_frame_index = 0
+            self.update_frame_display()
+        else:
+            self.update_info_label()
+        self.update_navigation_state()
+        self.frame_total_label.config(text=f"/ {len(self.frames)}")
+
     def update_frame_display(self):
         """Update the display with the current frame and preview background image if set."""
         if not self.frames or self.current_frame_index >= len(self.frames):
@@ -245,6 +266,8 @@ class FrameViewer(ttk.Frame):
         
         try:
             current_frame = self.frames[self.current_frame_index].copy() # Work on a copy
+            # Decode the neighbouring frames in the background for smooth stepping/playback
+            self.frames.prefetch(self.current_frame_index)
 
             # Get canvas dimensions
             canvas_width = self.canvas.winfo_width()
@@ -0,0 +1,276 @@
+import fnmatch
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+def default_cache_folder():
+    """Per-user folder for DiskDecodeCache (LOCALAPPDATA on Windows, else XDG/~/.cache)."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'SpriteScaler', 'decoded')
+
+
+class DiskDecodeCache:
+    """Decoded frames of image files kept on disk, keyed by (path, mtime, size).
+
+    Each file is stored as one raw (N, H, W, 4) uint8 .npy stack and read back
+    memory-mapped, so a cache hit costs a file open instead of a PNG/GIF decode.
+    A changed file gets a new key; old entries are evicted least recently used
+    first (entries are touched on every hit) once the cache holds more than
+    max_bytes or max_files. The folder is scanned once, entry sizes and use
+    order are then tracked in memory.
+    """
+
+    def __init__(self, folder=None, max_bytes=1024 * 1024 * 1024, max_files=5000):
+        self.folder = folder or default_cache_folder()
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # entry path -> size in bytes, least recently used first
+        self._bytes = 0
+        os.makedirs(self.folder, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.npy'):
+                st = entry.stat()
+                found.append((st.st_mtime, entry.path, st.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._bytes += size
+
+    def _entry(self, path):
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+        return os.path.join(self.folder, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest() + '.npy')
+
+    def get(self, path):
+        """The cached (N, H, W, 4) stack of path (memory-mapped, read-only), or None."""
+        entry = self._entry(path)
+        try:
+            stack = np.load(entry, mmap_mode='r')
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+        return stack
+
+    def put(self, path, frames):
+        """Store the frames of path as RGBA and return the cached stack."""
+        entry = self._entry(path)
+        stack = np.stack([np.asarray(frame.convert('RGBA')) for frame in frames])
+        tmp = f"{entry}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.save(f, stack)
+            os.replace(tmp, entry)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        size = os.path.getsize(entry)
+        with self._lock:
+            self._bytes += size - self._entries.pop(entry, 0)
+            self._entries[entry] = size
+        self.evict()
+        return stack
+
+    def evict(self):
+        """Delete least recently used entries until the limits hold."""
+        with self._lock:
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_files):
+                path, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # gone already, or still mapped (Windows): picked up by a later session's scan
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith('.npy'):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+
+def decoded_stack(path, disk_cache):
+    """RGBA (N, H, W, 4) stack of every frame of path from disk_cache, decoding and storing it on a miss.
+
+    If the cache can't be written (disk full, read-only folder) the decoded
+    frames are returned without caching them.
+    """
+    stack = disk_cache.get(path)
+    if stack is None:
+        frames, _ = decode_file(path)
+        try:
+            stack = disk_cache.put(path, frames)
+        except OSError as e:
+            logging.warning(f"Could not cache decoded frames of {path}: {e}")
+            stack = np.stack([np.asarray(frame.convert('RGBA')) for frame in frames])
+    return stack
+
+
+def decode_file(path, disk_cache=None):
+    """Decode every frame of an image file in one open.
+
+    Returns (frames, paths): GIF frames get a (path, frame index) entry each,
+    any other file a single frame with the plain path, as the save code expects.
+    With a DiskDecodeCache the frames come from (and go to) the cache and
+    are RGBA images over the memory-mapped stack.
+    """
+    if disk_cache is not None:
+        stack = decoded_stack(path, disk_cache)
+        frames = [Image.fromarray(arr, 'RGBA') for arr in stack]
+        if os.path.splitext(path)[1].lower() == '.gif':
+            return frames, [(path, i) for i in range(len(frames))]
+        return frames, [path]
+    with Image.open(path) as img:
+        if os.path.splitext(path)[1].lower() == '.gif':
+            frames = []
+            for i in range(getattr(img, 'n_frames', 1)):
+                img.seek(i)
+                frames.append(img.copy())
+            return frames, [(path, i) for i in range(len(frames))]
+        img.load()
+        return [img], [path]
+
+
+def scan_file(path):
+    """Return (paths, sizes) of an image file from its header, without decoding pixels.
+
+    Path entries are the same as decode_file's; every GIF frame has the GIF
+    canvas size.
+    """
+    with Image.open(path) as img:
+        if os.path.splitext(path)[1].lower() == '.gif':
+            n = getattr(img, 'n_frames', 1)
+            return [(path, i) for i in range(n)], [img.size] * n
+        return [path], [img.size]
+
+
+def _map_files(func, paths, workers=None, progress=None, cancelled=None):
+    """Run func(path) for every path on a thread pool; results in path order, None where it failed.
+
+    progress(done) is called after each finished file and cancelled() is
+    polled while waiting; files not started yet are dropped on cancel.
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    results = [None] * len(paths)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, path): i for i, path in enumerate(paths)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logging.error(f"Error loading file {paths[i]}: {e}")
+            if progress:
+                progress(done)
+            if cancelled and cancelled():
+                for pending in futures:
+                    pending.cancel()
+                break
+    return results
+
+
+def _concat(results):
+    first, second = [], []
+    for result in results:
+        if result is not None:
+            first.extend(result[0])
+            second.extend(result[1])
+    return first, second
+
+
+def scan_files(paths, workers=None, progress=None, cancelled=None):
+    """scan_file for several files on a thread pool; returns (frame_paths, sizes) in path order."""
+    return _concat(_map_files(scan_file, paths, workers, progress, cancelled))
+
+
+def parse_patterns(text):
+    """Split "*.png, *.gif !*_old*" into (include, exclude) glob lists; "!" marks an exclude."""
+    include, exclude = [], []
+    for item in text.replace(',', ' ').replace(';', ' ').split():
+        if item.startswith('!'):
+            if item[1:]:
+                exclude.append(item[1:])
+        else:
+            include.append(item)
+    return include, exclude
+
+
+def _matches(rel_path, patterns):
+    name = rel_path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def find_images(folder, include=None, exclude=(), recursive=True):
+    """Image files under folder, sorted by relative path.
+
+    A file is kept if its path relative to folder (with "/" separators) or
+    its name matches one of the include globs (default: the IMAGE_EXTENSIONS)
+    and none of the exclude globs. Matching is case-insensitive.
+    """
+    include = [p.lower() for p in (include or ['*' + ext for ext in IMAGE_EXTENSIONS])]
+    exclude = [p.lower() for p in exclude]
+    found = []
+    for root, dirs, files in os.walk(folder):
+        if recursive:
+            dirs.sort()
+        else:
+            dirs[:] = []
+        for name in files:
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, folder).replace(os.sep, '/').lower()
+            if _matches(rel_path, include) and not _matches(rel_path, exclude):
+                found.append(path)
+    found.sort(key=lambda path: os.path.relpath(path, folder).lower().split(os.sep))
+    return found
+
+
+def iter_files(func, paths, workers=None, cancelled=None):
+    """Yield (path, func(path)) in path order while later files are still being processed.
+
+    func runs on a thread pool with a bounded number of files in flight;
+    files that fail are logged and yield None. Stops early when cancelled()
+    returns True.
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        remaining = iter(paths)
+        for path in remaining:
+            pending.append((path, pool.submit(func, path)))
+            if len(pending) >= workers * 4:
+                break
+        while pending:
+            if cancelled and cancelled():
+                for _, future in pending:
+                    future.cancel()
+                return
+            path, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Error loading file {path}: {e}")
+                result = None
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(func, next_path)))
+            yield path, result
@@ -1,4 +1,10 @@
+import atlas
 import outlining
+import export
+import loader
+import resampling
+import sheet
+from scalers import ScalerRegistry
 # filepath: c:\Users\its_m\Documents\SpriteScaler\main.py
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -7,8 +13,11 @@ import sys
 import json
 import logging
 from frame_viewer import FrameViewer
+from frame_stack import MappedFrameStack
+from frame_store import DecodeCache, FrameStore
 from palette_handler import PaletteHandler
 from PIL import Image, ImageDraw
+import numpy as np
 
 os.environ['MAGICK_HOME'] = os.path.join(os.path.dirname(__file__), 'imagemagick')
 
@@ -33,9 +42,70 @@ except ImportError:
     WAND_AVAILABLE = False
     logging.warning("ImageMagick/Wand not available")
 
-from io import BytesIO
 
 class NewToolApp:
+    # Frames scaled per step of the background scaling job (progress/cancel granularity)
+    SCALE_CHUNK = 16
+    # Frames decoded and prepared at a time when saving separate files
+    SAVE_CHUNK = 64
+
+    @staticmethod
+    def _copy_frames(frames):
+        """Copy a frame sequence: a FrameStore copy shares its (lazily decoded) frames, a
+        MappedFrameStack is wrapped in a FrameStore over its views, lists are copied frame by frame."""
+        if isinstance(frames, FrameStore):
+            return frames.copy()
+        if isinstance(frames, MappedFrameStack):
+            return FrameStore.from_mapped(frames)
+        return [frame.copy() for frame in frames]
+
+    @staticmethod
+    def _snapshot_frames(frames):
+        """Shallow copy of a frame sequence for a background job, without decoding it:
+        FrameStores share their lazy frames, a MappedFrameStack is read through views."""
+        if isinstance(frames, FrameStore):
+            return frames.copy()
+        if isinstance(frames, MappedFrameStack):
+            return FrameStore.from_mapped(frames)
+        return list(frames)
+
+    def _new_frame_sink(self):
+        """Container a batch job appends its result frames to: a MappedFrameStack in the session
+        folder when "Disk-backed frames" is ticked, else a list. Call on the Tk thread."""
+        if hasattr(self, 'disk_frames_var') and self.disk_frames_var.get():
+            stack = MappedFrameStack()
+            self._frame_stacks.add(stack)
+            return stack
+        return []
+
+    def _release_frame_stacks(self):
+        """Close the MappedFrameStacks made by _new_frame_sink that neither the viewer, the
+        original preview frames nor any undo/redo history reads from anymore (a cancelled
+        job's sink, states dropped from the history). Call on the Tk thread."""
+        held = [self.preview_viewer.frames, getattr(self, '_original_preview_frames', None)]
+        for history in (self._color_edit_undo_stack, self._color_edit_redo_stack,
+                        self._outline_undo_stack, self._outline_redo_stack):
+            held.extend(history)
+        for history in (self._scale_undo_stack, self._scale_redo_stack):
+            held.extend(frames for frames, _ in history)
+        live = set()
+        for frames in held:
+            if isinstance(frames, FrameStore):
+                live |= frames.mapped_stacks()
+            elif isinstance(frames, MappedFrameStack):
+                live.add(frames)
+        for stack in self._frame_stacks - live:
+            stack.close()
+        self._frame_stacks &= live
+
+    @staticmethod
+    def _frame_chunk(frames, start, count):
+        """frames[start:start + count] for a batch step; a FrameStore stays a FrameStore
+        so disk-backed frames reach the kernels as mapped stacks (see FrameStore.stacks)."""
+        if isinstance(frames, FrameStore):
+            return frames.window(start, start + count)
+        return frames[start:start + count]
+
     def _fill_transparency_with_color(self, frame, fill_color):
         """Return a copy of frame with all transparent pixels filled with fill_color (RGB tuple)."""
         if frame.mode != 'RGBA':
@@ -44,22 +114,31 @@ class NewToolApp:
         background.paste(frame, mask=frame.split()[3])  # Use alpha channel as mask
         return background.convert('RGB')
     
-    def _quantize_alpha_channel(self, frame, threshold=128):
-        """Convert semi-transparent pixels to fully opaque or fully transparent.
-        Pixels with alpha < threshold become fully transparent (0), others become fully opaque (255)."""
-        if frame.mode != 'RGBA':
-            frame = frame.convert('RGBA')
-        
-        pixels = frame.load()
-        for y in range(frame.height):
-            for x in range(frame.width):
-                r, g, b, a = pixels[x, y]
-                # Convert semi-transparent pixels to either fully opaque or fully transparent
-                new_alpha = 255 if a >= threshold else 0
-                pixels[x, y] = (r, g, b, new_alpha)
-        
-        return frame
-    
+    def _finalize_scaled_frames(self, frames, threshold=128, palette_handler=None, remember=True):
+        """Binarize alpha and put back the transparency color on scaled frames.
+        Pixels with alpha < threshold become transparent; with a transparency color set they
+        (and pixels within tolerance of it) are filled with that color instead.
+        If palette_handler has a palette, each frame is mapped to it in the same pass
+        (with remember set the unmapped frame is kept as its original so the palette can be
+        removed later; pass False for frames that are only saved or go into a MappedFrameStack,
+        whose images are never looked up again)."""
+        fill_color = self.palette_handler.transparency_color
+        ttol = int(getattr(self.palette_handler, 'transparency_tolerance', 0))
+        use_palette = palette_handler is not None and palette_handler.palette_colors is not None
+        finalized = []
+        for frame in frames:
+            arr = np.array(frame.convert('RGBA'))
+            resampling.finalize_alpha(arr, threshold, fill_color, ttol)
+            if not use_palette:
+                finalized.append(Image.fromarray(arr, 'RGBA'))
+                continue
+            original = Image.fromarray(arr, 'RGBA')
+            mapped = Image.fromarray(palette_handler.map_array_to_palette(arr), 'RGBA')
+            if remember:
+                palette_handler.remember_original(mapped, original)
+            finalized.append(mapped)
+        return finalized
+
     def sync_preview_to_frame_viewer(self, *args, **kwargs):
         # No-op: frame_viewer removed, keep for compatibility
         pass
@@ -88,6 +167,27 @@ class NewToolApp:
             self._outline_undo_stack = []
             self._outline_redo_stack = []
 
+            # Scaling backends are probed once per filter; the offered filters are resolved
+            # in the background right away (the registry is thread safe, first use waits)
+            import threading
+            self.scalers = ScalerRegistry(WandImage if WAND_AVAILABLE else None)
+            threading.Thread(target=self.scalers.probe_all, args=(self.filter_names,), daemon=True).start()
+
+            # Cell layouts of loaded sprite sheets by path, for reassembly on save
+            self._sheet_layouts = {}
+            self._frame_stacks = set()  # MappedFrameStacks from _new_frame_sink not closed yet
+            # Total scale applied to the viewer frames since they were loaded (for sheet reassembly)
+            self._frames_scale = 1.0
+
+            # Decoded frames persisted across sessions, keyed by (path, mtime, size)
+            try:
+                self.decode_cache = loader.DiskDecodeCache()
+            except OSError as e:
+                logging.warning(f"Decode cache disabled: {e}")
+                self.decode_cache = None
+            # One LRU of decoded frames for every load, so its byte budget holds for the whole session
+            self.frame_cache = DecodeCache(transform=self._decode_transform, disk_cache=self.decode_cache)
+
         except Exception as e:
             logging.error(f"Error initializing: {e}", exc_info=True)
 
@@ -113,6 +213,8 @@ class NewToolApp:
 
         self.load_file_button = ttk.Button(file_frame, text="Load File(s)", command=self.load_file_dialog)
         self.load_file_button.pack(side="left", padx=5, pady=5)
+        ttk.Button(file_frame, text="Load Folder...", command=self.load_folder_dialog).pack(side="left", padx=(0, 5), pady=5)
+        ttk.Button(file_frame, text="Load Sheet...", command=self.load_sheet_dialog).pack(side="left", padx=(0, 5), pady=5)
         self.unload_all_button = ttk.Button(file_frame, text="Unload all", command=self.unload_all_files)
         self.unload_all_button.pack(side="left", padx=(0,5), pady=5)
 
@@ -179,6 +281,16 @@ class NewToolApp:
         self.scale_entry.pack(side="left", padx=5)
 
         ttk.Button(scale_controls_frame, text="Apply Scale", command=self.apply_scale).pack(side="left", padx=5)
+        # Scale and write straight to the save folder without loading the result
+        ttk.Button(scale_controls_frame, text="Scale & Save", command=self.scale_and_save).pack(side="left", padx=(0, 5))
+
+        # Tiled mode: scale big sprite sheets in tiles to bound memory
+        self.tiled_scale_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(scale_controls_frame, text="Tiled (large sheets)", variable=self.tiled_scale_var).pack(side="left", padx=5)
+
+        # Disk-backed frames: results of scale/outline/color jobs go to memory-mapped stacks
+        self.disk_frames_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(scale_controls_frame, text="Disk-backed frames", variable=self.disk_frames_var).pack(side="left", padx=5)
 
         # Undo/Redo buttons for scaling
         scale_undo_redo_frame = ttk.Frame(scale_controls_frame)
@@ -198,9 +310,15 @@ class NewToolApp:
             ('Smooth (Lanczos) – Enlarging', 'lanczos'),
             ('Enhanced Pixel Art (MagicKernelSharp2021) – Shrink & Enlarge', 'magic-kernel'),
             ('Nearest Neighbor – Shrinking', 'point'),
+            ('Box (Area Average) – Shrinking 50% / 25%', 'box'),
             ('Bicubic Sharper – Shrinking', 'bicubic-sharper'),
+            ('Scale2x / EPX – Pixel art 2× / 4×', 'scale2x'),
+            ('Scale3x – Pixel art 3×', 'scale3x'),
+            ('Eagle – Pixel art 2× / 4×', 'eagle'),
+            ('xBR-lite – Pixel art 2× / 4× (smooth diagonals)', 'xbr-lite'),
         ]
 
+        self.filter_names = [value for _, value in filters]
         for text, value in filters:
             ttk.Radiobutton(
                 filter_frame,
@@ -258,6 +376,32 @@ class NewToolApp:
         self.transparent_replacement_canvas.pack(side="left", padx=2)
         self.transparent_replacement_canvas.bind("<Button-1>", self.pick_transparent_replacement_color)
 
+        # PNG encoder settings used when saving (higher level = smaller, slower)
+        self.png_optimize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(replace_transparent_frame, text="Optimize", variable=self.png_optimize_var).pack(side="right")
+        self.png_compress_level_var = tk.IntVar(value=6)
+        ttk.Spinbox(replace_transparent_frame, from_=0, to=9, width=3, textvariable=self.png_compress_level_var).pack(side="right", padx=(0, 5))
+        ttk.Label(replace_transparent_frame, text="PNG level").pack(side="right", padx=(0, 3))
+
+        # Incremental save: skip frames unchanged since the last save into the folder
+        self.incremental_save_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(save_frame, text="Skip unchanged", variable=self.incremental_save_var).pack(side="left", padx=(0, 8))
+        # Opt-in: delete files an earlier save recorded in the folder that this save doesn't produce
+        self.prune_export_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(save_frame, text="Delete stale", variable=self.prune_export_var).pack(side="left", padx=(0, 8))
+
+        # Animated output (GIF sources with several frames): format and frame duration
+        self.animation_format_var = tk.StringVar(value="GIF")
+        ttk.Combobox(save_frame, textvariable=self.animation_format_var, values=("GIF", "APNG", "WebP"),
+                     state="readonly", width=6).pack(side="left", padx=(0, 3))
+        self.frame_duration_var = tk.IntVar(value=100)
+        ttk.Spinbox(save_frame, from_=10, to=10000, increment=10, width=5, textvariable=self.frame_duration_var).pack(side="left")
+        ttk.Label(save_frame, text="ms").pack(side="left", padx=(2, 8))
+
+        # Indexed PNG: write 8-bit palette PNGs when a palette is loaded
+        self.indexed_png_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(replace_transparent_frame, text="Indexed PNG", variable=self.indexed_png_var).pack(side="right", padx=(0, 8))
+
         # Folder picker for saving images
         self.save_folder = os.getcwd()
         self.save_folder_label_var = tk.StringVar(value=os.path.basename(self.save_folder))
@@ -274,6 +418,8 @@ class NewToolApp:
         folder_label.pack(side="right", padx=(0, 8))
 
         ttk.Button(save_frame, text="Save Image(s)", command=self.save_scaled_image).pack(side="right")
+        ttk.Button(save_frame, text="Export Sizes...", command=self.export_multi_resolution).pack(side="right", padx=(0, 5))
+        ttk.Button(save_frame, text="Save Atlas", command=self.save_atlas).pack(side="right", padx=(0, 5))
 
         # --- Change Color Group ---
         change_color_frame = ttk.LabelFrame(right_panel, text="Change color")
@@ -351,6 +497,8 @@ class NewToolApp:
         button_frame.pack(side="bottom", fill="x", pady=(8,0))
         self.apply_color_change_button = ttk.Button(button_frame, text="Apply", command=self.apply_color_replacement)
         self.apply_color_change_button.pack(side="left", fill="x", expand=True, padx=(0, 8))
+        # Apply to every frame and write straight to the save folder without loading the result
+        ttk.Button(button_frame, text="Apply & Save", command=self.color_change_and_save).pack(side="left", padx=(0, 8))
         self.reset_color_preview_button = ttk.Button(button_frame, text="Reset", command=self.reset_color_preview)
         self.reset_color_preview_button.pack(side="left", fill="x")
         # Checkbox: Apply to current frame only
@@ -464,6 +612,7 @@ class NewToolApp:
         apply_outline_frame.pack(pady=(6, 6), padx=10, fill="x")
         self.apply_outline_btn = ttk.Button(apply_outline_frame, text="Apply outlining", command=self.apply_outlining)
         self.apply_outline_btn.pack(side="left", fill="x", expand=True)
+        ttk.Button(apply_outline_frame, text="Outline & Save", command=self.outline_and_save).pack(side="left", padx=(5, 0))
 
         # Undo/Redo buttons for outlining
         outline_undo_redo_frame = ttk.Frame(apply_outline_frame)
@@ -501,7 +650,7 @@ class NewToolApp:
 
         if not self.outline_enabled_var.get():
             # Outlining not enabled: show original frames and restore previous preview settings
-            self.preview_viewer.load_frames([frame.copy() for frame in self._original_preview_frames])
+            self.preview_viewer.load_frames(self._copy_frames(self._original_preview_frames))
             self.preview_viewer.bg_image = original_preview_bg_image
             self.preview_viewer.transparency_color = original_preview_transparency_color
             self.preview_viewer.update_frame_display()
@@ -526,7 +675,7 @@ class NewToolApp:
 
         if transparency_color_app_wide is None:
             # Can't preview outlining without a transparency color to define the sprite boundary
-            self.preview_viewer.load_frames([frame.copy() for frame in self._original_preview_frames])
+            self.preview_viewer.load_frames(self._copy_frames(self._original_preview_frames))
             self.preview_viewer.bg_image = original_preview_bg_image
             self.preview_viewer.transparency_color = original_preview_transparency_color
             self.preview_viewer.update_frame_display()
@@ -538,7 +687,7 @@ class NewToolApp:
         def _within_tol(ca, cb, tol):
             return abs(ca[0] - cb[0]) <= tol and abs(ca[1] - cb[1]) <= tol and abs(ca[2] - cb[2]) <= tol
         if _within_tol(color1, transparency_color_app_wide, ttol) or (use_gradient and _within_tol(color2, transparency_color_app_wide, ttol)):
-            self.preview_viewer.load_frames([frame.copy() for frame in self._original_preview_frames])
+            self.preview_viewer.load_frames(self._copy_frames(self._original_preview_frames))
             self.preview_viewer.bg_image = original_preview_bg_image
             self.preview_viewer.transparency_color = original_preview_transparency_color
             self.preview_viewer.update_frame_display()
@@ -603,7 +752,7 @@ class NewToolApp:
 
     def _apply_outlining_with_undo(self):
         # Save current state for undo
-        self._outline_undo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._outline_undo_stack.append(self._copy_frames(self.preview_viewer.frames))
         self._outline_redo_stack.clear() # Clear redo stack on new action
 
         # Call the outlining logic which handles its own loading screen and preview updates
@@ -623,14 +772,14 @@ class NewToolApp:
             return
         
         # Save current state for redo
-        self._outline_redo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._outline_redo_stack.append(self._copy_frames(self.preview_viewer.frames))
         
         # Pop previous state from undo stack
         prev_frames = self._outline_undo_stack.pop()
         
         # Update both preview and originals, and force UI refresh
-        self._original_preview_frames = [frame.copy() for frame in prev_frames]
-        self.preview_viewer.load_frames([frame.copy() for frame in prev_frames])
+        self._original_preview_frames = self._copy_frames(prev_frames)
+        self.preview_viewer.load_frames(self._copy_frames(prev_frames))
         self.update_preview_with_bg()
         self.preview_viewer.update_frame_display()
         logging.info("Outlining action undone.")
@@ -641,14 +790,14 @@ class NewToolApp:
             return
         
         # Save current state for undo
-        self._outline_undo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._outline_undo_stack.append(self._copy_frames(self.preview_viewer.frames))
         
         # Pop next state from redo stack
         next_frames = self._outline_redo_stack.pop()
         
         # Load next frames into viewer
-        self.preview_viewer.load_frames([frame.copy() for frame in next_frames])
-        self._original_preview_frames = [frame.copy() for frame in next_frames] # Update originals
+        self.preview_viewer.load_frames(self._copy_frames(next_frames))
+        self._original_preview_frames = self._copy_frames(next_frames) # Update originals
         self.update_preview_with_bg() # Force display update with correct BG settings
         logging.info("Outlining action redone.")
 
@@ -693,7 +842,7 @@ class NewToolApp:
                 from outlining import apply_transparency_color
                 ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
                 frames = [apply_transparency_color(frame, self.transparency_color, ttol) for frame in self._original_preview_frames]
-                self.preview_viewer.load_frames([frame.copy() for frame in frames])
+                self.preview_viewer.load_frames(self._copy_frames(frames))
         self.preview_viewer.current_frame_index = cur_idx
         self.preview_viewer.zoom = cur_zoom
         self.preview_viewer.update_frame_display()
@@ -755,26 +904,45 @@ class NewToolApp:
 
     # Removed choose_replace_color, not needed with new sliders
 
-    def apply_color_replacement(self):
-        """Apply color replacement/adjustment to frames, always using original frames as base (no double-apply)."""
-        import threading
-        if not self.picked_color:
-            messagebox.showwarning("Warning", "Please pick a color.")
-            return
+    def _color_change_func(self):
+        """Return adjust(frame) applying the current color change settings (picked color, sliders,
+        then the transparency color) to one frame. Reads the Tk variables now, so the result
+        can be used from a worker thread."""
+        from outlining import apply_transparency_color
+        picked_color = self.picked_color
         input_tolerance = self.input_tolerance_var.get()
         hue_shift = self.hue_var.get()
         sat_shift = self.sat_var.get()
         bri_shift = self.bri_var.get()
         sharpness = self.sharpness_var.get() if hasattr(self, 'sharpness_var') else 1.0
         contrast = self.contrast_var.get() if hasattr(self, 'contrast_var') else 0.0
+        transparency_color_palette = getattr(self.palette_handler, 'transparency_color', None)
+        ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
+
+        def adjust(frame):
+            new_img = self.palette_handler.adjust_hsv_in_image(
+                frame, picked_color, input_tolerance, hue_shift, sat_shift, bri_shift, sharpness, contrast
+            )
+            if transparency_color_palette is not None:
+                new_img = apply_transparency_color(new_img, transparency_color_palette, ttol)
+            return new_img
+        return adjust
+
+    def apply_color_replacement(self):
+        """Apply color replacement/adjustment to frames, always using original frames as base (no double-apply)."""
+        import threading
+        if not self.picked_color:
+            messagebox.showwarning("Warning", "Please pick a color.")
+            return
+        adjust = self._color_change_func()
         # Always use _original_preview_frames as base to avoid double-application
         if not hasattr(self, '_original_preview_frames') or not self._original_preview_frames:
-            base_frames = [frame.copy() for frame in self.preview_viewer.frames]
+            base_frames = self._copy_frames(self.preview_viewer.frames)
         else:
-            base_frames = [frame.copy() for frame in self._original_preview_frames]
+            base_frames = self._copy_frames(self._original_preview_frames)
 
         # Save undo state before applying
-        self._color_edit_undo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._color_edit_undo_stack.append(self._copy_frames(self.preview_viewer.frames))
         self._color_edit_redo_stack.clear()
 
         apply_current_only = self.apply_to_current_frame_var.get() if hasattr(self, 'apply_to_current_frame_var') else False
@@ -783,18 +951,10 @@ class NewToolApp:
             if not (0 <= cur_idx < len(base_frames)):
                 messagebox.showerror("Error", "No valid current frame selected.")
                 return
-            from outlining import apply_transparency_color
-            transparency_color_palette = getattr(self.palette_handler, 'transparency_color', None)
-            new_frames = [frame.copy() for frame in base_frames]
-            new_img = self.palette_handler.adjust_hsv_in_image(
-                base_frames[cur_idx], self.picked_color, input_tolerance, hue_shift, sat_shift, bri_shift, sharpness, contrast
-            )
-            if transparency_color_palette is not None:
-                ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
-                new_img = apply_transparency_color(new_img, transparency_color_palette, ttol)
-            new_frames[cur_idx] = new_img
+            new_frames = self._copy_frames(base_frames)
+            new_frames[cur_idx] = adjust(base_frames[cur_idx])
             self.preview_viewer.load_frames(new_frames)
-            self._original_preview_frames = [frame.copy() for frame in new_frames]
+            self._original_preview_frames = self._copy_frames(new_frames)
             # Restore frame index
             self.preview_viewer.current_frame_index = cur_idx
             self.preview_viewer.update_frame_display()
@@ -822,33 +982,28 @@ class NewToolApp:
             self._cancel_apply = True
         cancel_btn = ttk.Button(loading_win, text="Cancel", command=on_cancel)
         cancel_btn.pack(pady=5)
+        sink = self._new_frame_sink()
 
         def worker():
-            from outlining import apply_transparency_color
-            new_frames = []
+            new_frames = sink
             total = len(base_frames)
-            transparency_color_palette = getattr(self.palette_handler, 'transparency_color', None)
             for i, frame in enumerate(base_frames):
                 if self._cancel_apply:
                     break
-                new_img = self.palette_handler.adjust_hsv_in_image(
-                    frame, self.picked_color, input_tolerance, hue_shift, sat_shift, bri_shift, sharpness, contrast
-                )
-                if transparency_color_palette is not None:
-                    ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
-                    new_img = apply_transparency_color(new_img, transparency_color_palette, ttol)
-                new_frames.append(new_img)
+                new_frames.append(adjust(frame))
                 progress_var.set(f"{i+1} / {total}")
             def on_done():
                 loading_win.grab_release()
                 loading_win.destroy()
                 if self._cancel_apply:
+                    self._release_frame_stacks()
                     messagebox.showinfo("Cancelled", "Color adjustment cancelled.")
                     return
                 image_paths = self.preview_viewer.get_image_paths() if hasattr(self.preview_viewer, 'get_image_paths') else [None] * len(new_frames)
                 self.preview_viewer.load_frames(new_frames)
                 self.preview_viewer.set_image_paths(image_paths)
-                self._original_preview_frames = [frame.copy() for frame in new_frames]
+                self._original_preview_frames = self._copy_frames(new_frames)
+                self._release_frame_stacks()
                 # Restore frame index
                 self.preview_viewer.current_frame_index = cur_idx if 0 <= cur_idx < len(new_frames) else 0
                 self.preview_viewer.update_frame_display()
@@ -868,10 +1023,10 @@ class NewToolApp:
             messagebox.showinfo("Undo", "Nothing to undo.")
             return
         # Save current state for redo
-        self._color_edit_redo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._color_edit_redo_stack.append(self._copy_frames(self.preview_viewer.frames))
         prev_frames = self._color_edit_undo_stack.pop()
-        self.preview_viewer.load_frames([frame.copy() for frame in prev_frames])
-        self._original_preview_frames = [frame.copy() for frame in prev_frames]
+        self.preview_viewer.load_frames(self._copy_frames(prev_frames))
+        self._original_preview_frames = self._copy_frames(prev_frames)
         # Restore frame index if possible
         if hasattr(self.preview_viewer, 'current_frame_index') and self.preview_viewer.current_frame_index < len(prev_frames):
             self.preview_viewer.update_frame_display()
@@ -881,10 +1036,10 @@ class NewToolApp:
             messagebox.showinfo("Redo", "Nothing to redo.")
             return
         # Save current state for undo
-        self._color_edit_undo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._color_edit_undo_stack.append(self._copy_frames(self.preview_viewer.frames))
         next_frames = self._color_edit_redo_stack.pop()
-        self.preview_viewer.load_frames([frame.copy() for frame in next_frames])
-        self._original_preview_frames = [frame.copy() for frame in next_frames]
+        self.preview_viewer.load_frames(self._copy_frames(next_frames))
+        self._original_preview_frames = self._copy_frames(next_frames)
         # Restore frame index if possible
         if hasattr(self.preview_viewer, 'current_frame_index') and self.preview_viewer.current_frame_index < len(next_frames):
             self.preview_viewer.update_frame_display()
@@ -901,11 +1056,11 @@ class NewToolApp:
         contrast = self.contrast_var.get() if hasattr(self, 'contrast_var') else 0.0
         # Use original frames for preview, if available
         if not hasattr(self, '_original_preview_frames'):
-            self._original_preview_frames = [frame.copy() for frame in self.preview_viewer.frames]
+            self._original_preview_frames = self._copy_frames(self.preview_viewer.frames)
         cur_idx = self.preview_viewer.current_frame_index if hasattr(self.preview_viewer, 'current_frame_index') else 0
         cur_zoom = getattr(self.preview_viewer, 'zoom', 1.0)
         # Copy all frames, but only modify the current one for live preview
-        new_frames = [frame.copy() for frame in self._original_preview_frames]
+        new_frames = self._copy_frames(self._original_preview_frames)
         if 0 <= cur_idx < len(new_frames):
             new_img = self.palette_handler.adjust_hsv_in_image(
                 self._original_preview_frames[cur_idx],
@@ -935,78 +1090,313 @@ class NewToolApp:
         self.contrast_var.set(0.0)
         # Only reset the color preview: restore preview to the original preview frames
         if hasattr(self, '_original_preview_frames'):
-            self.preview_viewer.load_frames([frame.copy() for frame in self._original_preview_frames])
+            self.preview_viewer.load_frames(self._copy_frames(self._original_preview_frames))
 
     def load_file_dialog(self):
-        """Open dialog to select image file(s) and load them into the preview viewer only, preserving original filenames."""
+        """Open dialog to select image file(s) and load them into the preview viewer only, preserving original filenames.
+
+        File headers are read in a background thread pool (see loader.scan_files) with a
+        progress window and the frames are added as a lazy FrameStore, decoded on use;
+        frames keep the selection order."""
+        import threading
         try:
             file_paths = filedialog.askopenfilenames(
                 title="Select Image File(s)",
                 filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.bmp;*.gif"), ("All Files", "*.*")]
             )
-            if file_paths:
-                all_frames = []
-                all_paths = []
-                for file_path in file_paths:
-                    frames = self.load_file(file_path)
-                    if frames:
-                        all_frames.extend(frames)
-                        ext = os.path.splitext(file_path)[1].lower()
-                        if ext == '.gif':
-                            try:
-                                with Image.open(file_path) as img:
-                                    n = img.n_frames
-                                    # Use the original filename for each frame, but append frame index for internal tracking
-                                    for i in range(n):
-                                        base, ext = os.path.splitext(file_path)
-                                        # Store as (original_path, frame_index) tuple for GIFs
-                                        all_paths.append((file_path, i))
-                            except Exception:
-                                n = len(frames)
-                                for i in range(n):
-                                    all_paths.append((file_path, i))
-                        else:
-                            all_paths.append(file_path)
-                if all_frames:
-                    # Append to existing frames if any (Load more behavior)
-                    if hasattr(self.preview_viewer, 'frames') and self.preview_viewer.frames:
-                        existing_frames = [frame.copy() for frame in self.preview_viewer.frames]
-                        existing_paths = self.preview_viewer.get_image_paths() if hasattr(self.preview_viewer, 'get_image_paths') else [None] * len(existing_frames)
-                        combined_frames = existing_frames + [frame.copy() for frame in all_frames]
-                        combined_paths = list(existing_paths) + list(all_paths)
-                        self.preview_viewer.load_frames(combined_frames)
-                        self.preview_viewer.set_image_paths(combined_paths)
-                        # Update originals lists
-                        self._original_preview_frames = [frame.copy() for frame in combined_frames]
-                        if hasattr(self, '_original_filenames') and isinstance(self._original_filenames, list):
-                            self._original_filenames.extend(list(all_paths))
-                        else:
-                            self._original_filenames = list(existing_paths) + list(all_paths)
-                    else:
-                        self.preview_viewer.load_frames([frame.copy() for frame in all_frames])
-                        self.preview_viewer.set_image_paths(list(all_paths))
-                        self._original_preview_frames = [frame.copy() for frame in all_frames]
-                        self._original_filenames = list(all_paths)  # Save for later use in saving
-
-                    # Clear all undo/redo histories when new files are loaded
-                    self._color_edit_undo_stack.clear()
-                    self._color_edit_redo_stack.clear()
-                    self._scale_undo_stack.clear()
-                    self._scale_redo_stack.clear()
-                    self._outline_undo_stack.clear()
-                    self._outline_redo_stack.clear()
-
-                    # Change the load button label to indicate loading more is possible
-                    try:
-                        self.load_file_button.config(text='Load more')
-                    except Exception:
-                        pass
-
-                    self.preview_refresh_btn.invoke()  # Simulate refresh button press
-                    logging.info(f"Loaded {len(all_frames)} frames from {len(file_paths)} files")
         except Exception as e:
             logging.error(f"Error in file dialog: {e}")
             messagebox.showerror("Error", f"Failed to load files: {e}")
+            return
+        if not file_paths:
+            return
+        file_paths = list(file_paths)
+        total = len(file_paths)
+
+        self._cancel_load = False
+        loading_win = tk.Toplevel(self.root)
+        loading_win.title("Loading")
+        loading_win.geometry("320x100")
+        loading_win.transient(self.root)
+        loading_win.grab_set()
+        tk.Label(loading_win, text=f"Loading {total} file(s)...", font=("Segoe UI", 11)).pack(pady=10)
+        progress_var = tk.StringVar(value="0 / {}".format(total))
+        tk.Label(loading_win, textvariable=progress_var).pack()
+        def on_cancel():
+            self._cancel_load = True
+        ttk.Button(loading_win, text="Cancel", command=on_cancel).pack(pady=5)
+
+        def worker():
+            all_frames, all_paths = None, []
+            error = None
+            try:
+                # Only headers are read here; pixels are decoded when a frame is used
+                all_paths, sizes = loader.scan_files(
+                    file_paths,
+                    progress=lambda done: self.root.after(0, lambda: progress_var.set(f"{done} / {total}")),
+                    cancelled=lambda: self._cancel_load
+                )
+                all_frames = FrameStore.from_sources(all_paths, sizes, self.frame_cache)
+            except Exception as e:
+                logging.error(f"Error loading files: {e}", exc_info=True)
+                error = e
+
+            def on_done():
+                loading_win.grab_release()
+                loading_win.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to load files: {error}")
+                    return
+                if self._cancel_load:
+                    logging.info("Loading cancelled.")
+                    return
+                try:
+                    self._add_loaded_frames(all_frames, all_paths)
+                    logging.info(f"Loaded {len(all_frames)} frames from {total} files")
+                except Exception as e:
+                    logging.error(f"Error in file dialog: {e}")
+                    messagebox.showerror("Error", f"Failed to load files: {e}")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def load_folder_dialog(self):
+        """Pick a folder and glob patterns, then load the matching images with load_folder."""
+        from tkinter import simpledialog
+        folder = filedialog.askdirectory(title="Select Folder to Load")
+        if not folder:
+            return
+        text = simpledialog.askstring(
+            "Load Folder",
+            "File patterns, searched in all subfolders\n(e.g. *.png *.gif; prefix with ! to exclude, e.g. !*_old*)",
+            initialvalue=" ".join('*' + ext for ext in loader.IMAGE_EXTENSIONS), parent=self.root
+        )
+        if text is None:
+            return
+        include, exclude = loader.parse_patterns(text)
+        self.load_folder(folder, include, exclude)
+
+    def load_folder(self, folder, include=None, exclude=(), recursive=True):
+        """Load every image under folder matching the include/exclude globs (see loader.find_images).
+
+        Files are read by a thread pool in a background job (and decoded into the disk
+        decode cache when it is enabled) and appended to the viewer in batches, in
+        path order, while the rest are still loading; the progress window is not
+        modal so the frames that already arrived can be browsed. If the frames are
+        replaced meanwhile (scaling, an edit, undo, unload), the load stops instead of
+        appending unedited frames to them. Frames keep their full paths, so saving
+        names them like files loaded one by one, prefixed with their folder name
+        when basenames repeat."""
+        import threading
+        import time
+        if getattr(self, '_folder_load_running', False):
+            return
+        paths = loader.find_images(folder, include, exclude, recursive)
+        if not paths:
+            messagebox.showinfo("Load Folder", "No matching images found.")
+            return
+        total = len(paths)
+        disk_cache = getattr(self, 'decode_cache', None)
+
+        def read(path):
+            if disk_cache is not None:
+                # Decode now so the frames are ready in the cache when shown
+                stack = loader.decoded_stack(path, disk_cache)
+                sources = [(path, i) for i in range(len(stack))] if os.path.splitext(path)[1].lower() == '.gif' else [path]
+                return sources, [(stack.shape[2], stack.shape[1])] * len(sources)
+            return loader.scan_file(path)
+
+        self._folder_load_running = True
+        self._cancel_folder_load = False
+        progress_win = tk.Toplevel(self.root)
+        progress_win.title("Loading Folder")
+        progress_win.geometry("320x100")
+        progress_win.transient(self.root)
+        tk.Label(progress_win, text=f"Loading {total} file(s)...", font=("Segoe UI", 11)).pack(pady=10)
+        progress_var = tk.StringVar(value="0 / {}".format(total))
+        tk.Label(progress_win, textvariable=progress_var).pack()
+        def on_cancel():
+            self._cancel_folder_load = True
+        ttk.Button(progress_win, text="Cancel", command=on_cancel).pack(pady=5)
+        progress_win.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        # The frames the batches are appended to; anything else means they were replaced
+        target = {'frames': getattr(self, '_original_preview_frames', None), 'replaced': False}
+
+        def add_batch(sources, sizes, done):
+            if target['replaced'] or getattr(self, '_original_preview_frames', None) is not target['frames']:
+                target['replaced'] = True
+                self._cancel_folder_load = True
+                return
+            progress_var.set(f"{done} / {total}")
+            if sources:
+                self._append_loaded_frames(FrameStore.from_sources(sources, sizes, self.frame_cache), sources)
+                target['frames'] = self._original_preview_frames
+
+        def worker():
+            sources, sizes = [], []
+            last_flush = time.monotonic()
+            done = 0
+            error = None
+            try:
+                for path, result in loader.iter_files(read, paths, cancelled=lambda: self._cancel_folder_load):
+                    done += 1
+                    if result is not None:
+                        sources.extend(result[0])
+                        sizes.extend(result[1])
+                    if time.monotonic() - last_flush > 0.25:
+                        self.root.after(0, add_batch, sources, sizes, done)
+                        sources, sizes = [], []
+                        last_flush = time.monotonic()
+            except Exception as e:
+                logging.error(f"Error loading folder {folder}: {e}", exc_info=True)
+                error = e
+
+            def on_done():
+                add_batch(sources, sizes, done)
+                self._folder_load_running = False
+                progress_win.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to load folder: {error}")
+                elif target['replaced']:
+                    logging.info(f"Folder load from {folder} stopped: the frames were changed")
+                    messagebox.showinfo("Load Folder", "Loading stopped because the frames were changed; "
+                                                       "the remaining files were not added.")
+                    return
+                logging.info(f"Loaded {done} of {total} files from {folder}")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _append_loaded_frames(self, frames, paths):
+        """Add a batch of a running folder load without resetting the view (first batch: _add_loaded_frames)."""
+        if not self.preview_viewer.frames or not isinstance(getattr(self, '_original_preview_frames', None), FrameStore):
+            self._add_loaded_frames(frames, paths)
+            return
+        self.preview_viewer.append_frames(self._copy_frames(frames), paths)
+        self._original_preview_frames.extend(frames)
+        if isinstance(getattr(self, '_original_filenames', None), list):
+            self._original_filenames.extend(paths)
+        else:
+            self._original_filenames = list(self.preview_viewer.get_image_paths())
+
+    def load_sheet_dialog(self):
+        """Pick a sprite sheet and a cell size (blank for automatic detection), then load it with load_sheet."""
+        from tkinter import simpledialog
+        path = filedialog.askopenfilename(
+            title="Select Sprite Sheet",
+            filetypes=[("Image files", "*.png *.gif *.bmp"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        text = simpledialog.askstring(
+            "Load Sheet",
+            "Cell size as WIDTHxHEIGHT (e.g. 32x32),\nor leave blank to detect the sprites automatically",
+            parent=self.root
+        )
+        if text is None:
+            return
+        text = text.strip().lower()
+        cell_size = None
+        if text and text != 'auto':
+            try:
+                cell_size = tuple(int(v) for v in text.split('x'))
+                if len(cell_size) != 2 or min(cell_size) < 1:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", f"Invalid cell size: {text}")
+                return
+        self.load_sheet(path, cell_size)
+
+    def load_sheet(self, path, cell_size=None):
+        """Cut a sprite sheet into frames (see sheet.slice_sheet) and append them to the viewer.
+
+        The sheet is decoded once and every frame is a zero-copy view of its cell;
+        with a palette loaded the frames are palette-mapped copies instead. Frames
+        are named sheet.SheetCell(path, cell index) and the cell coordinates are kept in
+        _sheet_layouts, so saving writes the sheet back in one piece."""
+        try:
+            sh = sheet.slice_sheet(path, cell_size, transparency_color=self.palette_handler.transparency_color)
+        except Exception as e:
+            logging.error(f"Error loading sheet {path}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load sheet: {e}")
+            return
+        if not len(sh):
+            messagebox.showinfo("Load Sheet", "No sprites found on this sheet.")
+            return
+        transform = self._palette_transform()
+        frames = FrameStore.from_mapped(sh)
+        if transform is not None:
+            frames = [transform(frame) for frame in frames]
+        self._add_loaded_frames(frames, sh.sources())
+        # Frames already loaded may be scaled; the sheet's own scale is relative to that
+        self._sheet_layouts[path] = dict(sh.layout(), base_scale=self._frames_scale)
+
+    def _palette_transform(self):
+        """Per-frame function mapping loaded frames to the loaded palette, or None without one.
+
+        Unlike apply_palette_to_image it keeps no originals in the palette handler, so it
+        is safe for frames that are decoded again whenever the decode cache drops them."""
+        handler = self.palette_handler
+        if handler.palette_colors is None:
+            return None
+        return lambda frame: Image.fromarray(handler.map_array_to_palette(np.array(frame.convert('RGBA'))), 'RGBA')
+
+    def _decode_transform(self, frame):
+        """DecodeCache transform: the palette loaded at decode time. Caches are cleared
+        (_clear_decoded_frames) whenever the palette or transparency color changes."""
+        transform = self._palette_transform()
+        return transform(frame) if transform is not None else frame
+
+    def _clear_decoded_frames(self):
+        """Drop lazily decoded frames so they are decoded again with the current palette."""
+        self.frame_cache.clear()
+
+    def _add_loaded_frames(self, all_frames, all_paths):
+        """Append newly loaded frames (a FrameStore or list, plus their original paths) to the preview viewer."""
+        if not all_frames:
+            return
+        # Append to existing frames if any (Load more behavior)
+        if hasattr(self.preview_viewer, 'frames') and self.preview_viewer.frames:
+            existing_paths = self.preview_viewer.get_image_paths() if hasattr(self.preview_viewer, 'get_image_paths') else [None] * len(self.preview_viewer.frames)
+            combined_frames = self._copy_frames(self.preview_viewer.frames)
+            combined_frames.extend(all_frames)
+            combined_paths = list(existing_paths) + list(all_paths)
+            self.preview_viewer.load_frames(combined_frames)
+            self.preview_viewer.set_image_paths(combined_paths)
+            # Update originals lists
+            self._original_preview_frames = self._copy_frames(combined_frames)
+            if hasattr(self, '_original_filenames') and isinstance(self._original_filenames, list):
+                self._original_filenames.extend(list(all_paths))
+            else:
+                self._original_filenames = list(existing_paths) + list(all_paths)
+        else:
+            self.preview_viewer.load_frames(self._copy_frames(all_frames))
+            self.preview_viewer.set_image_paths(list(all_paths))
+            self._original_preview_frames = self._copy_frames(all_frames)
+            self._original_filenames = list(all_paths)  # Save for later use in saving
+            self._frames_scale = 1.0
+            # Forget the layouts of sheets that are no longer loaded
+            loaded_sheets = {p.path for p in all_paths if isinstance(p, sheet.SheetCell)}
+            for path in [p for p in self._sheet_layouts if p not in loaded_sheets]:
+                del self._sheet_layouts[path]
+
+        # Clear all undo/redo histories when new files are loaded
+        self._color_edit_undo_stack.clear()
+        self._color_edit_redo_stack.clear()
+        self._scale_undo_stack.clear()
+        self._scale_redo_stack.clear()
+        self._outline_undo_stack.clear()
+        self._outline_redo_stack.clear()
+        self._release_frame_stacks()
+
+        # Change the load button label to indicate loading more is possible
+        try:
+            self.load_file_button.config(text='Load more')
+        except Exception:
+            pass
+
+        self.preview_refresh_btn.invoke()  # Simulate refresh button press
 
     def load_palette(self):
         """Open dialog to select a palette image."""
@@ -1029,47 +1419,30 @@ class NewToolApp:
         """Reapply current palette to all loaded images in the preview viewer."""
         try:
             if hasattr(self.preview_viewer, 'frames') and self.preview_viewer.frames:
-                new_frames = []
-                for frame in self.preview_viewer.frames:
-                    new_frames.append(self.palette_handler.apply_palette_to_image(frame))
+                if isinstance(self.preview_viewer.frames, FrameStore):
+                    # Frames decoded from files pick up the palette when decoded again
+                    self._clear_decoded_frames()
+                    new_frames = self.preview_viewer.frames.map_held(self.palette_handler.apply_palette_to_image)
+                else:
+                    new_frames = []
+                    for frame in self.preview_viewer.frames:
+                        new_frames.append(self.palette_handler.apply_palette_to_image(frame))
                 image_paths = self.preview_viewer.get_image_paths() if hasattr(self.preview_viewer, 'get_image_paths') else [None] * len(new_frames)
                 self.preview_viewer.load_frames(new_frames)
                 self.preview_viewer.set_image_paths(image_paths)
-                self._original_preview_frames = [frame.copy() for frame in new_frames]
+                self._original_preview_frames = self._copy_frames(new_frames)
         except Exception as e:
             logging.error(f"Error reapplying palette: {e}")
 
     def load_file(self, file_path):
         """Load a file (GIF or image) and return list of frames."""
         try:
-            ext = os.path.splitext(file_path)[1].lower()
-            frames = []
-            
-            if ext == '.gif':
-                try:
-                    with Image.open(file_path) as img:
-                        for i in range(img.n_frames):
-                            img.seek(i)
-                            frame = img.copy()
-                            if self.palette_handler.palette_colors is not None:
-                                frame = self.palette_handler.apply_palette_to_image(frame)
-                            frames.append(frame)
-                    logging.info(f"Loaded GIF with {len(frames)} frames from {file_path}")
-                except Exception as e:
-                    logging.error(f"Error loading GIF {file_path}: {e}")
-            else:
-                # Regular image file
-                try:
-                    img = Image.open(file_path)
-                    if self.palette_handler.palette_colors is not None:
-                        img = self.palette_handler.apply_palette_to_image(img)
-                    frames.append(img)
-                    logging.info(f"Loaded image from {file_path}")
-                except Exception as e:
-                    logging.error(f"Error loading image {file_path}: {e}")
-                    
+            frames, _ = loader.decode_file(file_path, getattr(self, 'decode_cache', None))
+            transform = self._palette_transform()
+            if transform is not None:
+                frames = [transform(frame) for frame in frames]
+            logging.info(f"Loaded {len(frames)} frame(s) from {file_path}")
             return frames
-                
         except Exception as e:
             logging.error(f"Error loading file {file_path}: {e}")
             return []
@@ -1090,6 +1463,14 @@ class NewToolApp:
                 config["transparency_tolerance"] = int(self.transparency_tolerance_var.get())
             except Exception:
                 config["transparency_tolerance"] = 0
+            # Save PNG encoder settings
+            try:
+                config["png_compress_level"] = int(self.png_compress_level_var.get())
+                config["png_optimize"] = bool(self.png_optimize_var.get())
+                config["animation_format"] = self.animation_format_var.get()
+                config["frame_duration"] = int(self.frame_duration_var.get())
+            except Exception:
+                pass
             with open("config.json", "w") as f:
                 json.dump(config, f, indent=4)
             logging.info(f"Config saved. Images: {len(config.get('images', []))} BG image: {config.get('bg_image_path')}")
@@ -1126,6 +1507,14 @@ class NewToolApp:
                         self.palette_handler.transparency_tolerance = tt
                     except Exception:
                         pass
+                    # Restore PNG encoder settings if present
+                    try:
+                        self.png_compress_level_var.set(int(config_data.get("png_compress_level", 6)))
+                        self.png_optimize_var.set(bool(config_data.get("png_optimize", False)))
+                        self.animation_format_var.set(config_data.get("animation_format", "GIF"))
+                        self.frame_duration_var.set(int(config_data.get("frame_duration", 100)))
+                    except Exception:
+                        pass
                     return config_data
             # If no config or missing images, clear bg image
             self.bg_image = None
@@ -1150,8 +1539,9 @@ class NewToolApp:
     def remove_palette(self):
         """Remove current palette and revert to original colors."""
         self.palette_handler.clear_palette()
+        self._clear_decoded_frames()
         if hasattr(self, '_original_preview_frames'):
-            self.preview_viewer.load_frames([frame.copy() for frame in self._original_preview_frames])
+            self.preview_viewer.load_frames(self._copy_frames(self._original_preview_frames))
         logging.info("Palette removed")
 
     def start_color_picking_mode(self):
@@ -1199,9 +1589,10 @@ class NewToolApp:
         # Immediately set "View Color" to False and update preview to show transparency
         self.view_transparency_color_var.set(False) # Turn off "View Color" by default after picking
         # Always reload preview from originals to reflect new transparency color, and restore frame index
+        self._clear_decoded_frames()
         if hasattr(self, '_original_preview_frames'):
             cur_idx = self.preview_viewer.current_frame_index if hasattr(self.preview_viewer, 'current_frame_index') else 0
-            self.preview_viewer.load_frames([frame.copy() for frame in self._original_preview_frames])
+            self.preview_viewer.load_frames(self._copy_frames(self._original_preview_frames))
             if 0 <= cur_idx < len(self._original_preview_frames):
                 self.preview_viewer.current_frame_index = cur_idx
         self.update_preview_with_bg() # This will now display transparency by default
@@ -1219,12 +1610,15 @@ class NewToolApp:
         # Clear stored originals and undo/redo stacks
         self._original_preview_frames = []
         self._original_filenames = []
+        self._frames_scale = 1.0
+        self._sheet_layouts.clear()
         self._color_edit_undo_stack.clear()
         self._color_edit_redo_stack.clear()
         self._scale_undo_stack.clear()
         self._scale_redo_stack.clear()
         self._outline_undo_stack.clear()
         self._outline_redo_stack.clear()
+        self._release_frame_stacks()
         # Reset load button label
         try:
             self.load_file_button.config(text='Load File(s)')
@@ -1283,8 +1677,268 @@ class NewToolApp:
         except Exception as e:
             logging.error(f"Error during cleanup: {e}")
 
+    def _resolve_save_paths(self, frames):
+        """Return the original path (or (gif path, frame index)) of every frame, None where unknown."""
+        # Use the original filenames as loaded (from self._original_filenames if available)
+        original_paths = []
+        if hasattr(self.preview_viewer, 'get_image_paths'):
+            original_paths = self.preview_viewer.get_image_paths()
+        # If all are None or empty, and we have _original_filenames, and frame count matches, use those
+        if (
+            (not original_paths or all(p is None for p in original_paths))
+            and hasattr(self, '_original_filenames')
+            and isinstance(self._original_filenames, (list, tuple))
+            and len(getattr(self, '_original_filenames', [])) == len(frames)
+        ):
+            original_paths = list(self._original_filenames)
+        elif not original_paths or len(original_paths) != len(frames):
+            logging.warning("No original filenames found for saving. Using generic names.")
+            original_paths = [None] * len(frames)
+        return original_paths
+
+    def _read_int_setting(self, var, name, low, high):
+        """Return an integer setting clamped to low..high (written back to var), or None
+        after showing an error when the text is not a whole number."""
+        try:
+            value = int(var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", f"Invalid {name} - must be a whole number")
+            return None
+        clamped = min(max(value, low), high)
+        if clamped != value:
+            var.set(clamped)
+        return clamped
+
+    def _save_options(self, confirm_prune=True):
+        """Read the save checkboxes once (the values are then safe to use off the Tk thread).
+
+        Returns None after showing an error if a numeric field holds invalid text, or
+        when "Delete stale" is ticked and the user declines the confirmation (asked
+        unless confirm_prune is False, for exports that don't write separate files)."""
+        compress_level, duration = 6, 100
+        if hasattr(self, 'png_compress_level_var'):
+            compress_level = self._read_int_setting(self.png_compress_level_var, "PNG compression level", 0, 9)
+        if hasattr(self, 'frame_duration_var'):
+            duration = self._read_int_setting(self.frame_duration_var, "frame duration", 1, 65535)
+        if compress_level is None or duration is None:
+            return None
+        prune = self.prune_export_var.get() if hasattr(self, 'prune_export_var') else False
+        if prune and confirm_prune and not messagebox.askokcancel(
+                "Delete stale files",
+                "Files that earlier saves wrote into the save folder and that this save does not "
+                "produce will be deleted (files changed since are kept). Continue?"):
+            return None
+        return dict(
+            put_back_transparency=self.put_back_transparency_var.get() if hasattr(self, 'put_back_transparency_var') else True,
+            replace_transparent=self.replace_transparent_var.get() if hasattr(self, 'replace_transparent_var') else False,
+            replacement_color=getattr(self, 'transparent_replacement_color', None),
+            compress_level=compress_level,
+            incremental=self.incremental_save_var.get() if hasattr(self, 'incremental_save_var') else False,
+            prune=prune,
+            indexed=self.indexed_png_var.get() if hasattr(self, 'indexed_png_var') else False,
+            optimize=self.png_optimize_var.get() if hasattr(self, 'png_optimize_var') else False,
+            animation_format=self.animation_format_var.get() if hasattr(self, 'animation_format_var') else 'GIF',
+            duration=duration,
+        )
+
+    def _frame_save_paths(self, frames, original_paths, save_folder):
+        """Return the output path of every frame when saved as separate files."""
+        # Prepare duplicate-name handling: determine basenames and counts
+        from collections import Counter
+        basename_keys = []
+        for p in original_paths:
+            if p is None:
+                basename_keys.append(None)
+            elif isinstance(p, tuple):
+                basename_keys.append(os.path.basename(p[0]))
+            else:
+                basename_keys.append(os.path.basename(p))
+        basename_counts = Counter([k for k in basename_keys if k is not None])
+
+        # Each frame keeps its original filename and extension (no _scaled, and prefix duplicates with folder name)
+        frame_paths = []
+        for i in range(len(frames)):
+            use_original = i < len(original_paths) and original_paths[i] is not None
+            if use_original:
+                orig_path = original_paths[i]
+                if isinstance(orig_path, tuple):
+                    # For GIFs, orig_path is (filepath, frame_index)
+                    base_name = os.path.basename(orig_path[0])
+                    orig_name, orig_ext = os.path.splitext(base_name)
+                    folder_name = os.path.basename(os.path.dirname(orig_path[0])) or ''
+                    # If basename duplicates exist, prefix with folder name
+                    prefix = f"{folder_name}_" if basename_counts.get(base_name, 0) > 1 and folder_name else ''
+                    frame_path = os.path.join(save_folder, f"{prefix}{orig_name}_frame{orig_path[1]+1}{orig_ext}")
+                else:
+                    base_name = os.path.basename(orig_path)
+                    orig_name, orig_ext = os.path.splitext(base_name)
+                    folder_name = os.path.basename(os.path.dirname(orig_path)) or ''
+                    prefix = f"{folder_name}_" if basename_counts.get(base_name, 0) > 1 and folder_name else ''
+                    frame_path = os.path.join(save_folder, f"{prefix}{orig_name}{orig_ext}")
+            else:
+                frame_path = os.path.join(save_folder, f"frame_{i+1}.png")
+            frame_paths.append(frame_path)
+        return frame_paths
+
+    def _save_frames(self, frames, original_paths, save_folder, put_back_transparency=True,
+                     replace_transparent=False, replacement_color=None, compress_level=6, optimize=False,
+                     incremental=False, prune=False, indexed=False, animation_format='GIF', duration=100,
+                     sheet_scale=1.0, progress=None, cancelled=None):
+        """Write frames to save_folder under their original filenames.
+
+        Separate files are written in parallel (see export.save_images); progress(done)
+        and cancelled() are passed through. With incremental set, frames unchanged since
+        the last export into that folder are skipped (see export.ExportManifest); with
+        prune set, files earlier exports recorded there that this one doesn't produce
+        are deleted. With indexed set and a palette loaded, PNG frames are written as 8-bit palette images.
+        Multi-frame GIF sources are saved as one animation in animation_format ('GIF',
+        'APNG' or 'WebP') with duration ms per frame. Frames cut from a sprite sheet are
+        written back as the sheet, scaled by sheet_scale (see _iter_save_jobs).
+        Safe to call off the Tk thread. Returns (anim_path, counts): the path when the
+        frames were saved as one animation, else None and the written/skipped/deleted counts."""
+        transparency = getattr(self.palette_handler, 'transparency_color', None)
+
+        # If all originals are GIF and multiple frames, save as one animation with the original name
+        if self._saves_as_animation(original_paths):
+            # Use the original name of the first frame
+            first_path = original_paths[0]
+            if isinstance(first_path, tuple):
+                orig_name, orig_ext = os.path.splitext(os.path.basename(first_path[0]))
+            elif isinstance(first_path, str):
+                orig_name, orig_ext = os.path.splitext(os.path.basename(first_path))
+            else:
+                orig_name, orig_ext = "output", ".gif"
+            frames_to_save = self._prepare_frames_for_save(
+                frames, transparency if put_back_transparency else None,
+                replacement_color if replace_transparent else None
+            )
+            duration = max(1, int(duration))
+            if animation_format == 'APNG':
+                # Only the changed rectangle of each frame is stored
+                anim_path = os.path.join(save_folder, f"{orig_name}.png")
+                export.write_apng(frames_to_save, anim_path, duration=duration, loop=0, compress_level=compress_level)
+            elif animation_format == 'WebP':
+                anim_path = os.path.join(save_folder, f"{orig_name}.webp")
+                export.write_webp(frames_to_save, anim_path, duration=duration, loop=0)
+            else:
+                # One global palette for all frames, index 0 reserved for transparency
+                anim_path = os.path.join(save_folder, f"{orig_name}{orig_ext}")
+                export.write_gif(
+                    frames_to_save, anim_path, duration=duration, loop=0,
+                    transparency_color=transparency if put_back_transparency else None
+                )
+            logging.info(f"Animated {animation_format} saved to: {anim_path}")
+            return anim_path, {'written': 1, 'skipped': 0, 'deleted': 0}
+
+        # Otherwise, save each frame as a separate file; frames are decoded SAVE_CHUNK at a
+        # time, prepared per size stack and encoded in a thread pool as they become ready
+        frame_paths = self._frame_save_paths(frames, original_paths, save_folder)
+        prepared = (
+            pair for start in range(0, len(frames), self.SAVE_CHUNK)
+            for pair in self._iter_save_ready(self._frame_chunk(frames, start, self.SAVE_CHUNK), start, put_back_transparency,
+                                              replace_transparent, replacement_color)
+        )
+        if indexed:
+            prepared = self._iter_indexed(prepared, frame_paths, transparency)
+        background = self._sheet_background(transparency, put_back_transparency, replace_transparent, replacement_color)
+        counts = export.save_images(
+            self._iter_save_jobs(prepared, frame_paths, original_paths, save_folder, background, sheet_scale),
+            compress_level=compress_level, optimize=optimize, progress=progress, cancelled=cancelled,
+            incremental=incremental, prune=prune
+        )
+        return None, counts
+
+    def _saves_as_animation(self, original_paths):
+        """True when every frame comes from a GIF and there are several, i.e. _save_frames writes one animation.
+
+        Frames cut from a sprite sheet (even a GIF one) are saved as a sheet instead."""
+        return len(original_paths) > 1 and all(
+            (isinstance(p, str) and os.path.splitext(p)[1].lower() == '.gif') or
+            (isinstance(p, tuple) and not isinstance(p, sheet.SheetCell) and os.path.splitext(p[0])[1].lower() == '.gif')
+            for p in original_paths
+        )
+
+    @staticmethod
+    def _sheet_background(transparency, put_back_transparency, replace_transparent, replacement_color):
+        """Fill color of the gaps between cells of a reassembled sheet, matching what the
+        save-time transparency steps make of transparent pixels (None keeps them transparent)."""
+        if replace_transparent and replacement_color is not None:
+            return replacement_color
+        if transparency and not put_back_transparency:
+            return transparency
+        return None
+
+    def _iter_save_jobs(self, prepared, frame_paths, original_paths, save_folder, background=None, scale=1.0):
+        """Turn prepared (index, image) pairs into (image, path) jobs for export.save_images.
+
+        Frames cut by load_sheet are held back per sheet; once the last of them has
+        arrived they are pasted back at their cell positions (sheet.assemble, with the
+        sheet and positions scaled by scale, the factor the frames were resized by)
+        and written as one image under the sheet's own name. scale is the total
+        scale of the frames since loading (_frames_scale); a sheet appended to frames
+        that were already scaled was loaded at its base_scale, which is divided out.
+        Cells that were removed are left empty."""
+        layouts = getattr(self, '_sheet_layouts', {})
+        expected = {}
+        for p in original_paths:
+            if isinstance(p, sheet.SheetCell) and p.path in layouts:
+                expected[p.path] = expected.get(p.path, 0) + 1
+        collected = {}
+        for i, image in prepared:
+            source = original_paths[i] if i < len(original_paths) else None
+            if not (isinstance(source, sheet.SheetCell) and source.path in expected):
+                yield image, frame_paths[i]
+                continue
+            cells = collected.setdefault(source[0], {})
+            cells[source[1]] = image
+            expected[source[0]] -= 1
+            if expected[source[0]] == 0:
+                layout = layouts[source[0]]
+                order = sorted(cells)
+                assembled = sheet.assemble(
+                    [cells[c] for c in order],
+                    {'size': layout['size'], 'cells': [layout['cells'][c] for c in order]},
+                    background, scale / layout.get('base_scale', 1.0)
+                )
+                del collected[source[0]]
+                yield assembled, os.path.join(save_folder, os.path.basename(source[0]))
+
+    def _iter_save_ready(self, frames, start=0, put_back_transparency=True, replace_transparent=False,
+                         replacement_color=None):
+        """Yield (start + index, image) with the save-time transparency steps applied to frames."""
+        transparency = getattr(self.palette_handler, 'transparency_color', None)
+        if transparency and not put_back_transparency:
+            # Fill transparent pixels with the transparency color (RGB output, nothing left to replace)
+            for i, frame in enumerate(frames, start):
+                yield i, self._fill_transparency_with_color(frame, transparency)
+        elif transparency or (replace_transparent and replacement_color is not None):
+            ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
+            for i, image in export.iter_prepared(frames, transparency, ttol, replacement_color if replace_transparent else None):
+                yield start + i, image
+        else:
+            yield from enumerate(frames, start)
+
+    def _iter_indexed(self, prepared, frame_paths, transparency_color=None):
+        """Turn prepared (index, image) pairs bound for PNG into indexed images using the
+        loaded palette (scaled result palette first). Frames that can't be stored
+        losslessly with it stay RGBA."""
+        handler = next((h for h in (self.scaled_palette_handler, self.palette_handler)
+                        if h.palette_colors is not None), None)
+        for i, image in prepared:
+            if handler is not None and frame_paths[i].lower().endswith('.png'):
+                indexed = export.to_indexed(image, handler, transparency_color)
+                if indexed is not None:
+                    image = indexed
+                else:
+                    logging.warning(f"Frame {i + 1} has colors outside the palette; saved as RGBA")
+            yield i, image
+
     def save_scaled_image(self):
-        """Save the scaled image to a file, always restoring the original filename for each frame."""
+        """Save the scaled image to a file, always restoring the original filename for each frame.
+
+        Saving runs in a background thread (frames are encoded in parallel) with a
+        progress window and Cancel; output names are the same as before."""
+        import threading
         try:
             if not self.preview_viewer.frames:
                 messagebox.showwarning("Warning", "No scaled image to save!")
@@ -1295,192 +1949,262 @@ class NewToolApp:
                 messagebox.showwarning("Pick a folder", "Please pick a folder to save images first.")
                 return
 
-            # Use the original filenames as loaded (from self._original_filenames if available)
-            original_paths = []
-            if hasattr(self.preview_viewer, 'get_image_paths'):
-                original_paths = self.preview_viewer.get_image_paths()
-            # If all are None or empty, and we have _original_filenames, and frame count matches, use those
-            if (
-                (not original_paths or all(p is None for p in original_paths))
-                and hasattr(self, '_original_filenames')
-                and isinstance(self._original_filenames, (list, tuple))
-                and len(getattr(self, '_original_filenames', [])) == len(self.preview_viewer.frames)
-            ):
-                original_paths = list(self._original_filenames)
-            elif not original_paths or len(original_paths) != len(self.preview_viewer.frames):
-                logging.warning("No original filenames found for saving. Using generic names.")
-                original_paths = [None] * len(self.preview_viewer.frames)
-
-
-            transparency = getattr(self.palette_handler, 'transparency_color', None)
-            put_back_transparency = self.put_back_transparency_var.get() if hasattr(self, 'put_back_transparency_var') else True
-
-            # If all originals are GIF and multiple frames, save as animated GIF with original name
-            all_gif = all(
-                (isinstance(p, (str, tuple)) and (
-                    (isinstance(p, str) and os.path.splitext(p)[1].lower() == '.gif') or
-                    (isinstance(p, tuple) and os.path.splitext(p[0])[1].lower() == '.gif')
-                )) for p in original_paths
-            ) if original_paths else False
-            if len(self.preview_viewer.frames) > 1 and all_gif:
-                # Use the original name of the first frame
-                first_path = original_paths[0]
-                if isinstance(first_path, tuple):
-                    orig_name, orig_ext = os.path.splitext(os.path.basename(first_path[0]))
-                elif isinstance(first_path, str):
-                    orig_name, orig_ext = os.path.splitext(os.path.basename(first_path))
-                else:
-                    orig_name, orig_ext = "output", ".gif"
-                gif_path = os.path.join(save_folder, f"{orig_name}{orig_ext}")
-                frames_to_save = []
-                replace_transparent = self.replace_transparent_var.get() if hasattr(self, 'replace_transparent_var') else False
-                for frame in self.preview_viewer.frames:
-                    frame_to_save = frame
-                    if transparency and put_back_transparency:
-                        frame_to_save = self._apply_transparency_to_frame(frame, transparency)
-                    # Replace transparent pixels with replacement color if checkbox is enabled
-                    if replace_transparent and hasattr(self, 'transparent_replacement_color'):
-                        frame_to_save = self._replace_transparent_pixels(frame_to_save, self.transparent_replacement_color)
-                    frames_to_save.append(frame_to_save)
-                # Find transparency index for GIF (if possible)
-                transparency_index = None
-                if transparency and put_back_transparency:
-                    # Attempt to convert to P mode and find transparency index
-                    try:
-                        # Convert to P mode to find the index of the transparency color in the palette
-                        # This conversion will quantize to a new palette, but we need the original transparency color's index.
-                        # It's better to ensure the transparency color exists in the palette or force it.
-                        # For simplicity and given the context, we'll try to use a common approach:
-                        # Convert to P mode with a limited palette, then check if transparency color is in the new palette.
-                        # A more robust solution might involve adding the transparency color to the palette explicitly
-                        # before conversion if it's not present, or using a known-transparent color for the palette.
-                        # For now, let's just attempt to find it if it exists.
-                        pal_frame = frames_to_save[0].convert('P', palette=Image.ADAPTIVE, colors=256) # Max GIF colors
-                        palette_data = pal_frame.getpalette()
-                        # Convert the palette data (R,G,B,R,G,B...) to a list of (R,G,B) tuples
-                        current_palette_colors = [(palette_data[i], palette_data[i+1], palette_data[i+2]) for i in range(0, len(palette_data), 3)]
-                        
-                        try:
-                            # Try to find the index of the transparency color in the current frame's palette
-                            # This will only work if the quantization process included the transparency color
-                            transparency_index = current_palette_colors.index(transparency)
-                        except ValueError:
-                            # If not found, it means the transparency color wasn't chosen by the palette.
-                            # In this case, either warn or let GIF handle it with default behavior (no explicit transparency index)
-                            logging.warning(f"Transparency color {transparency} not found in quantized GIF palette. GIF transparency might not be exact.")
-                            transparency_index = None # Fallback to no explicit transparency index
-                            
-                    except Exception as e:
-                        logging.error(f"Error determining GIF transparency index: {e}")
-                        transparency_index = None
-                
-                save_kwargs = dict(
-                    save_all=True,
-                    append_images=frames_to_save[1:],
-                    optimize=False,
-                    duration=100,  # 100ms per frame
-                    loop=0
+            frames = self._snapshot_frames(self.preview_viewer.frames)
+            original_paths = self._resolve_save_paths(frames)
+            save_options = self._save_options()
+            if save_options is None:
+                return
+            sheet_scale = self._frames_scale
+            total = len(frames)
+        except Exception as e:
+            logging.error(f"Error saving scaled image: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to save image: {e}")
+            return
+
+        self._cancel_save = False
+        loading_win = tk.Toplevel(self.root)
+        loading_win.title("Saving")
+        loading_win.geometry("320x100")
+        loading_win.transient(self.root)
+        loading_win.grab_set()
+        tk.Label(loading_win, text="Saving frames...", font=("Segoe UI", 11)).pack(pady=10)
+        progress_var = tk.StringVar(value="0 / {}".format(total))
+        tk.Label(loading_win, textvariable=progress_var).pack()
+        def on_cancel():
+            self._cancel_save = True
+        ttk.Button(loading_win, text="Cancel", command=on_cancel).pack(pady=5)
+        loading_win.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        def worker():
+            written = [0]
+            anim_path = None
+            counts = None
+            error = None
+            def progress(done):
+                written[0] = done
+                self.root.after(0, lambda: progress_var.set(f"{done} / {total}"))
+            try:
+                anim_path, counts = self._save_frames(
+                    frames, original_paths, save_folder, sheet_scale=sheet_scale, progress=progress,
+                    cancelled=lambda: self._cancel_save, **save_options
                 )
-                if transparency_index is not None:
-                    save_kwargs['transparency'] = transparency_index
-                
-                # If frames_to_save[0] is not already 'P' mode, convert it to handle palette for GIF
-                if frames_to_save[0].mode != 'P':
-                    frames_to_save[0] = frames_to_save[0].quantize(colors=256, method=Image.WEB) # or Image.ADAPTIVE
-                
-                frames_to_save[0].save(
-                    gif_path,
-                    **save_kwargs
+            except Exception as e:
+                logging.error(f"Error saving scaled image: {e}", exc_info=True)
+                error = e
+
+            def on_done():
+                loading_win.grab_release()
+                loading_win.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to save image: {error}")
+                elif anim_path:
+                    messagebox.showinfo("Success", f"Animation saved as {anim_path}")
+                elif self._cancel_save:
+                    logging.info(f"Saving cancelled after {written[0]} of {total} frames")
+                    messagebox.showinfo("Cancelled", f"Saving cancelled after {written[0]} of {total} frames.")
+                else:
+                    summary = f"{counts['written']} written, {counts['skipped']} unchanged, {counts['deleted']} deleted"
+                    messagebox.showinfo("Success", f"All {total} frames saved to {save_folder}!\n({summary})")
+                    logging.info(f"Scaled image(s) saved to: {save_folder} ({summary})")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def save_atlas(self):
+        """Save all frames as one trimmed, packed atlas PNG plus a JSON frame map.
+
+        Frame names are the filenames save_scaled_image would use; each entry also
+        records the trim offset, original size and source file of the frame."""
+        import threading
+        if not self.preview_viewer.frames:
+            messagebox.showwarning("Warning", "No scaled image to save!")
+            return
+        save_folder = getattr(self, 'save_folder', None)
+        if not save_folder or not isinstance(save_folder, str) or not os.path.isdir(save_folder):
+            messagebox.showwarning("Pick a folder", "Please pick a folder to save images first.")
+            return
+
+        frames = list(self.preview_viewer.frames)
+        original_paths = self._resolve_save_paths(frames)
+        save_options = self._save_options(confirm_prune=False)
+        if save_options is None:
+            return
+        names = [os.path.basename(p) for p in self._frame_save_paths(frames, original_paths, save_folder)]
+        sources = [list(p) if isinstance(p, tuple) else p for p in original_paths]
+        first = original_paths[0][0] if isinstance(original_paths[0], tuple) else original_paths[0]
+        stem = os.path.splitext(os.path.basename(first))[0] if first else "frames"
+        atlas_path = os.path.join(save_folder, f"{stem}_atlas.png")
+
+        self._cancel_atlas = False
+        loading_win = tk.Toplevel(self.root)
+        loading_win.title("Saving Atlas")
+        loading_win.geometry("320x100")
+        loading_win.transient(self.root)
+        loading_win.grab_set()
+        tk.Label(loading_win, text=f"Packing {len(frames)} frames...", font=("Segoe UI", 11)).pack(pady=10)
+        def on_cancel():
+            self._cancel_atlas = True
+        ttk.Button(loading_win, text="Cancel", command=on_cancel).pack(pady=5)
+        loading_win.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        def worker():
+            json_path = None
+            error = None
+            try:
+                transparency = getattr(self.palette_handler, 'transparency_color', None)
+                prepared = self._prepare_frames_for_save(
+                    frames, transparency if save_options['put_back_transparency'] else None,
+                    save_options['replacement_color'] if save_options['replace_transparent'] else None
                 )
-                messagebox.showinfo("Success", f"Animated GIF saved as {gif_path}")
-                logging.info(f"Animated GIF saved to: {gif_path}")
-                return
+                # Packing and encoding are one step; cancel skips writing if it comes before them
+                if not self._cancel_atlas:
+                    json_path = atlas.write_atlas(
+                        prepared, names, atlas_path, sources,
+                        compress_level=save_options['compress_level'], optimize=save_options['optimize']
+                    )
+            except Exception as e:
+                logging.error(f"Error saving atlas: {e}", exc_info=True)
+                error = e
 
-            # Prepare duplicate-name handling: determine basenames and counts
-            from collections import Counter
-            basename_keys = []
-            for p in original_paths:
-                if p is None:
-                    basename_keys.append(None)
-                elif isinstance(p, tuple):
-                    basename_keys.append(os.path.basename(p[0]))
+            def on_done():
+                loading_win.grab_release()
+                loading_win.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to save atlas: {error}")
+                elif json_path is None:
+                    logging.info("Atlas export cancelled")
+                    messagebox.showinfo("Cancelled", "Atlas export cancelled.")
                 else:
-                    basename_keys.append(os.path.basename(p))
-            basename_counts = Counter([k for k in basename_keys if k is not None])
-
-            # Otherwise, save each frame as a separate file with original filename and extension (no _scaled, and prefix duplicates with folder name)
-            for i, frame in enumerate(self.preview_viewer.frames):
-                use_original = i < len(original_paths) and original_paths[i] is not None
-                if use_original:
-                    orig_path = original_paths[i]
-                    if isinstance(orig_path, tuple):
-                        # For GIFs, orig_path is (filepath, frame_index)
-                        base_name = os.path.basename(orig_path[0])
-                        orig_name, orig_ext = os.path.splitext(base_name)
-                        folder_name = os.path.basename(os.path.dirname(orig_path[0])) or ''
-                        # If basename duplicates exist, prefix with folder name
-                        prefix = f"{folder_name}_" if basename_counts.get(base_name, 0) > 1 and folder_name else ''
-                        frame_path = os.path.join(save_folder, f"{prefix}{orig_name}_frame{orig_path[1]+1}{orig_ext}")
-                    else:
-                        base_name = os.path.basename(orig_path)
-                        orig_name, orig_ext = os.path.splitext(base_name)
-                        folder_name = os.path.basename(os.path.dirname(orig_path)) or ''
-                        prefix = f"{folder_name}_" if basename_counts.get(base_name, 0) > 1 and folder_name else ''
-                        frame_path = os.path.join(save_folder, f"{prefix}{orig_name}{orig_ext}")
+                    messagebox.showinfo("Success", f"Atlas saved as {atlas_path}\nFrame map: {json_path}")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @staticmethod
+    def _parse_export_targets(text, default_filter):
+        """Parse "100, 200, 400:scale2x" into [(scale_percent, filter_name), ...]."""
+        targets = []
+        for item in text.replace(';', ',').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            percent, _, filter_name = item.partition(':')
+            percent = float(percent.strip().rstrip('%'))
+            if percent <= 0:
+                raise ValueError(f"Scale percentage must be positive: {item}")
+            targets.append((percent, filter_name.strip() or default_filter))
+        if not targets:
+            raise ValueError("No scale percentages given")
+        return targets
+
+    def export_multi_resolution(self):
+        """Scale the current frames to several sizes and save each variant in one background pass.
+
+        The frames are decoded and transparency-masked once and shared by every
+        target (NumPy weight matrices are cached per size as well). Each variant is
+        finalized like apply_scale (alpha, scaled palette) and written with
+        _save_frames into its own subfolder of the save folder, e.g. 2x/ or
+        2x_scale2x/ when several filters are used, under the usual filenames."""
+        import threading
+        from tkinter import simpledialog
+        if not self.preview_viewer.frames:
+            messagebox.showwarning("Warning", "No frames loaded to export.")
+            return
+        save_folder = getattr(self, 'save_folder', None)
+        if not save_folder or not isinstance(save_folder, str) or not os.path.isdir(save_folder):
+            messagebox.showwarning("Pick a folder", "Please pick a folder to save images first.")
+            return
+        default_filter = self.filter_var.get()
+        text = simpledialog.askstring(
+            "Export Sizes",
+            f"Scale % list, optionally with a filter per entry\n(e.g. 100, 200, 400 or 200:scale2x; default filter: {default_filter})",
+            initialvalue="100, 200, 400", parent=self.root
+        )
+        if not text:
+            return
+        try:
+            targets = self._parse_export_targets(text, default_filter)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid scale list: {e}")
+            return
+
+        frames = self._copy_frames(self.preview_viewer.frames)
+        original_paths = self._resolve_save_paths(frames)
+        save_options = self._save_options()
+        if save_options is None:
+            return
+        several_filters = len({f for _, f in targets}) > 1
+        frames_scale = self._frames_scale
+
+        self._cancel_export = False
+        loading_win = tk.Toplevel(self.root)
+        loading_win.title("Exporting Sizes")
+        loading_win.geometry("320x100")
+        loading_win.transient(self.root)
+        loading_win.grab_set()
+        tk.Label(loading_win, text=f"Exporting {len(targets)} size(s)...", font=("Segoe UI", 11)).pack(pady=10)
+        progress_var = tk.StringVar(value="0 / {}".format(len(targets)))
+        tk.Label(loading_win, textvariable=progress_var).pack()
+        def on_cancel():
+            self._cancel_export = True
+        ttk.Button(loading_win, text="Cancel", command=on_cancel).pack(pady=5)
+        loading_win.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        def worker():
+            written = []
+            error = None
+            try:
+                transparency_color = self.palette_handler.transparency_color
+                stacks = resampling.stack_frames(frames, transparency_color)
+                for n, (percent, filter_type) in enumerate(targets):
+                    if self._cancel_export:
+                        break
+                    folder_name = f"{percent / 100.0:g}x" + (f"_{filter_type}" if several_filters else "")
+                    folder = os.path.join(save_folder, folder_name)
+                    os.makedirs(folder, exist_ok=True)
+                    scaled = self.scalers.get(filter_type).scale(frames, percent / 100.0, transparency_color, stacks)
+                    scaled = self._finalize_scaled_frames(scaled, palette_handler=self.scaled_palette_handler,
+                                                          remember=False)
+                    self._save_frames(scaled, original_paths, folder, sheet_scale=frames_scale * percent / 100.0,
+                                      cancelled=lambda: self._cancel_export, **save_options)
+                    written.append(folder_name)
+                    logging.info(f"Exported {filter_type} {percent:g}% to {folder}")
+                    self.root.after(0, lambda done=n + 1: progress_var.set(f"{done} / {len(targets)}"))
+            except Exception as e:
+                logging.error(f"Error exporting sizes: {e}", exc_info=True)
+                error = e
+
+            def on_done():
+                loading_win.grab_release()
+                loading_win.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to export sizes: {error}")
+                elif self._cancel_export:
+                    messagebox.showinfo("Cancelled", f"Export cancelled after {len(written)} size(s).")
                 else:
-                    frame_path = os.path.join(save_folder, f"frame_{i+1}.png")
-                frame_to_save = frame
-                if transparency:
-                    if put_back_transparency:
-                        frame_to_save = self._apply_transparency_to_frame(frame, transparency)
-                    else:
-                        # Fill transparent pixels with the transparency color
-                        frame_to_save = self._fill_transparency_with_color(frame, transparency)
-                
-                # Replace transparent pixels with replacement color if checkbox is enabled
-                replace_transparent = self.replace_transparent_var.get() if hasattr(self, 'replace_transparent_var') else False
-                if replace_transparent and hasattr(self, 'transparent_replacement_color'):
-                    frame_to_save = self._replace_transparent_pixels(frame_to_save, self.transparent_replacement_color)
-                
-                frame_to_save.save(frame_path)
-            messagebox.showinfo("Success", f"All {len(self.preview_viewer.frames)} frames saved to {save_folder}!")
-            logging.info(f"Scaled image(s) saved to: {save_folder}")
-        except Exception as e:
-            logging.error(f"Error saving scaled image: {e}")
-            messagebox.showerror("Error", f"Failed to save image: {e}")
+                    messagebox.showinfo("Success", f"Saved {', '.join(written)} to {save_folder}")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _prepare_frames_for_save(self, frames, transparency_color=None, replacement_color=None):
+        """Make transparency_color transparent, then fill fully transparent pixels with
+        replacement_color (RGB result), processing equal-size frames as one array stack.
+        Frames are returned unchanged when neither step applies."""
+        if not transparency_color and replacement_color is None:
+            return list(frames)
+        ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
+        return export.prepare_frames(frames, transparency_color, ttol, replacement_color)
 
     def _apply_transparency_to_frame(self, frame, transparency_color):
         # Returns a copy of frame with the given RGB color set to transparent (for GIF/PNG)
-        img = frame.convert('RGBA')
-        datas = img.getdata()
-        newData = []
         ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
-        if ttol <= 0:
-            for item in datas:
-                if item[:3] == transparency_color:
-                    newData.append((item[0], item[1], item[2], 0))
-                else:
-                    newData.append(item)
-        else:
-            for item in datas:
-                r, g, b = item[:3]
-                if abs(r - transparency_color[0]) <= ttol and abs(g - transparency_color[1]) <= ttol and abs(b - transparency_color[2]) <= ttol:
-                    newData.append((r, g, b, 0))
-                else:
-                    newData.append(item)
-        img.putdata(newData)
-        return img
+        arr = export.make_color_transparent(np.array(frame.convert('RGBA')), transparency_color, ttol)
+        return Image.fromarray(arr, 'RGBA')
 
     def _replace_transparent_pixels(self, frame, replacement_color):
         """Replace all transparent pixels (alpha=0) with the specified replacement color."""
-        img = frame.convert('RGBA')
-        pixels = img.load()
-        for y in range(img.height):
-            for x in range(img.width):
-                r, g, b, a = pixels[x, y]
-                if a == 0:  # Fully transparent pixel
-                    pixels[x, y] = replacement_color + (255,)  # Replace with opaque replacement color
-        return img.convert('RGB')  # Convert back to RGB since transparency was replaced
+        return Image.fromarray(export.replace_transparent(np.array(frame.convert('RGBA')), replacement_color), 'RGB')
 
     def load_scaled_palette(self):
         """Open dialog to select a palette image for scaled results."""
@@ -1521,190 +2245,318 @@ class NewToolApp:
             logging.error(f"Error removing scaled palette: {e}")
             messagebox.showerror("Error", f"Failed to remove scaled palette: {e}")
 
+    def _scale_frames(self, frames, scale_factor, filter_type, tiled=False):
+        """Scale frames with the backend registered for filter_type. Safe to call off the Tk thread.
+
+        With tiled set, resampling filters go through the NumPy tiled engine so a
+        whole sprite sheet never has to be resized in one piece."""
+        if tiled and filter_type in resampling.ENGINE_FILTERS:
+            return resampling.resize_frames_tiled(
+                frames, scale_factor, filter_type,
+                transparency_color=self.palette_handler.transparency_color
+            )
+        scaler = self.scalers.get(filter_type)
+        return scaler.scale(frames, scale_factor, self.palette_handler.transparency_color)
+
     def apply_scale(self):
-        """Apply the scaling to the current frames using available scaling method and selected scaling mode."""
-        try:
-            # Warn if a palette is loaded
-            if self.palette_handler.palette_colors is not None:
-                if not messagebox.askokcancel("Palette Warning", "A palette is loaded, if you continue it will apply the palette too"):
-                    return
-            # Validate scale percentage first
-            try:
-                scale_percent = float(self.scale_var.get())
-                if scale_percent <= 0:
-                    messagebox.showerror("Error", "Scale percentage must be positive")
-                    return
-            except ValueError:
-                messagebox.showerror("Error", "Invalid scale percentage - must be a number")
-                return
-            scale_factor = scale_percent / 100.0
+        """Apply the scaling to the current frames using available scaling method and selected scaling mode.
 
-            if not self.preview_viewer.frames:
-                messagebox.showwarning("Warning", "No frames loaded to scale.")
+        Scaling runs in a background thread in chunks of SCALE_CHUNK frames, so the
+        window stays responsive, progress is shown and the job can be cancelled
+        between chunks. Results are handed back to the Tk thread with root.after."""
+        import threading
+        if getattr(self, '_scale_job_running', False):
+            return
+        # Warn if a palette is loaded
+        if self.palette_handler.palette_colors is not None:
+            if not messagebox.askokcancel("Palette Warning", "A palette is loaded, if you continue it will apply the palette too"):
                 return
+        # Validate scale percentage first
+        scale_percent = self._read_scale_percent()
+        if scale_percent is None:
+            return
+        scale_factor = scale_percent / 100.0
 
-            # Save current state for undo
-            self._scale_undo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
-            self._scale_redo_stack.clear() # Clear redo stack on new action
-
-            # --- Determine which frames to scale based on radio selection ---
+        if not self.preview_viewer.frames:
+            messagebox.showwarning("Warning", "No frames loaded to scale.")
+            return
 
-            # Always use the currently edited frames (preview panel)
-            current_frames_to_scale = [frame.copy() for frame in self.preview_viewer.frames]
-            # Preserve image paths (if any) as they are associated with the "set of frames"
-            image_paths = self.preview_viewer.get_image_paths()
+        # Snapshot for undo; only pushed once the job completes
+        undo_frames = self._copy_frames(self.preview_viewer.frames)
+        # Always use the currently edited frames (preview panel)
+        current_frames_to_scale = self._copy_frames(self.preview_viewer.frames)
+        # Preserve image paths (if any) as they are associated with the "set of frames"
+        image_paths = self.preview_viewer.get_image_paths()
+        filter_type = self.filter_var.get()
+        tiled = self.tiled_scale_var.get()
+        total = len(current_frames_to_scale)
+
+        self._scale_job_running = True
+        self._cancel_scale = False
+        loading_win = tk.Toplevel(self.root)
+        loading_win.title("Applying Scale")
+        loading_win.geometry("320x100")
+        loading_win.transient(self.root)
+        loading_win.grab_set()
+        tk.Label(loading_win, text=f"Scaling frames to {scale_percent:g}%...", font=("Segoe UI", 11)).pack(pady=10)
+        progress_var = tk.StringVar(value="0 / {}".format(total))
+        tk.Label(loading_win, textvariable=progress_var).pack()
+        def on_cancel():
+            self._cancel_scale = True
+            progress_var.set("Cancelling...")
+        ttk.Button(loading_win, text="Cancel", command=on_cancel).pack(pady=5)
+        loading_win.protocol("WM_DELETE_WINDOW", on_cancel)
+        sink = self._new_frame_sink()
 
+        def worker():
+            scaled_frames = sink
+            error = None
+            try:
+                for start in range(0, total, self.SCALE_CHUNK):
+                    if self._cancel_scale:
+                        break
+                    chunk = self._frame_chunk(current_frames_to_scale, start, self.SCALE_CHUNK)
+                    scaled = self._scale_frames(chunk, scale_factor, filter_type, tiled)
+                    # Quantize alpha, restore the transparency color and map to the
+                    # scaled palette (if loaded) in one pass per frame
+                    scaled_frames.extend(self._finalize_scaled_frames(
+                        scaled, palette_handler=self.scaled_palette_handler,
+                        remember=not isinstance(scaled_frames, MappedFrameStack)
+                    ))
+                    done = len(scaled_frames)
+                    self.root.after(0, lambda done=done: progress_var.set(f"{done} / {total}"))
+            except Exception as e:
+                logging.error(f"Error applying scale: {e}", exc_info=True)
+                error = e
 
-            if not WAND_AVAILABLE:
-                # Use PIL's scaling methods or custom
-                filter_type = self.filter_var.get()
-                filter_map = {
-                    'point': Image.NEAREST,
-                    'bicubic-sharper': Image.BICUBIC, # PIL's BICUBIC is quite good, sharpening can be applied afterwards
-                    'lanczos': Image.LANCZOS,
-                }
-                scaled_frames = []
-                if filter_type == 'bicubic-sharper':
-                    # Bicubic with sharpening for shrinking
-                    for frame in current_frames_to_scale:
-                        new_size = (int(frame.width * scale_factor), int(frame.height * scale_factor))
-                        scaled = frame.resize(new_size, Image.BICUBIC)
-                        from PIL import ImageFilter
-                        scaled = scaled.filter(ImageFilter.UnsharpMask(radius=1, percent=150, threshold=3))
-                        # Quantize alpha channel to remove semi-transparent pixels
-                        scaled = self._quantize_alpha_channel(scaled)
-                        scaled_frames.append(scaled)
-                elif filter_type == 'realesrgan':
-                    messagebox.showerror("Not Implemented", "Real-ESRGAN is not implemented in this build.")
-                    # Revert undo state if a non-implemented feature is chosen
-                    if self._scale_undo_stack: # Only pop if it was pushed
-                        self._scale_undo_stack.pop() 
+            def on_done():
+                self._scale_job_running = False
+                loading_win.grab_release()
+                loading_win.destroy()
+                if error is not None or self._cancel_scale:
+                    self._release_frame_stacks()
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to apply scaling: {str(error)}")
                     return
-                else:
-                    pil_filter = filter_map.get(filter_type, Image.LANCZOS)
-                    for frame in current_frames_to_scale:
-                        new_size = (int(frame.width * scale_factor), int(frame.height * scale_factor))
-                        scaled_frame = frame.resize(new_size, pil_filter)
-                        # Quantize alpha channel to remove semi-transparent pixels
-                        scaled_frame = self._quantize_alpha_channel(scaled_frame)
-                        scaled_frames.append(scaled_frame)
+                if self._cancel_scale:
+                    logging.info("Scaling cancelled.")
+                    messagebox.showinfo("Cancelled", "Scaling cancelled.")
+                    return
+                self._scale_undo_stack.append((undo_frames, self._frames_scale))
+                self._scale_redo_stack.clear() # Clear redo stack on new action
+                self._frames_scale *= scale_factor
                 self.preview_viewer.load_frames(scaled_frames)
-                # If frame count matches, preserve mapping; else, fallback to None
                 if len(scaled_frames) == len(image_paths):
                     self.preview_viewer.set_image_paths(image_paths)
                 else:
                     logging.warning("Frame count changed after scaling; not all original filenames can be preserved.")
                     self.preview_viewer.set_image_paths([None] * len(scaled_frames))
-                # Update _original_preview_frames to the newly scaled frames
-                self._original_preview_frames = [frame.copy() for frame in scaled_frames]
+                # Update _original_preview_frames to the newly scaled (and palette-mapped) frames
+                self._original_preview_frames = self._copy_frames(scaled_frames)
+                self._release_frame_stacks()
                 self.preview_refresh_btn.invoke()  # Simulate refresh button press
-                logging.info(f"Applied PIL scaling ({filter_type}): {scale_percent}%")
+                logging.info(f"Applied {filter_type} scaling: {scale_percent}%")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _read_scale_percent(self):
+        """Return the scale percentage from the entry, or None after showing an error."""
+        try:
+            scale_percent = float(self.scale_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid scale percentage - must be a number")
+            return None
+        if scale_percent <= 0:
+            messagebox.showerror("Error", "Scale percentage must be positive")
+            return None
+        return scale_percent
+
+    def _iter_processed_for_save(self, frames, process, save_options, cancelled):
+        """Run process on frames SCALE_CHUNK at a time and yield (index, image) ready to encode.
+
+        process(chunk) returns the finished frames of a chunk (e.g. scaled and
+        finalized like apply_scale); they get the save-time transparency steps
+        and the next chunk is only processed when the consumer asks for more."""
+        for start in range(0, len(frames), self.SCALE_CHUNK):
+            if cancelled():
                 return
+            done = process(self._frame_chunk(frames, start, self.SCALE_CHUNK))
+            yield from self._iter_save_ready(
+                done, start, save_options['put_back_transparency'],
+                save_options['replace_transparent'], save_options['replacement_color']
+            )
 
-            # Scale frames using ImageMagick
-            scaled_frames = []
-            for frame in current_frames_to_scale:
-                img_byte_arr = BytesIO()
-                if frame.mode != 'RGBA':
-                    frame = frame.convert('RGBA')
-                frame.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                with WandImage(blob=img_byte_arr) as wand_img:
-                    new_width = int(wand_img.width * scale_factor)
-                    new_height = int(wand_img.height * scale_factor)
-                    transparency_color_palette = self.palette_handler.transparency_color # Use palette handler's color
-                    if transparency_color_palette:
-                        r, g, b = transparency_color_palette
-                        color_str = f'rgb({r},{g},{b})'
-                        wand_img.transparent_color(color_str, alpha=0, fuzz=0)
-                    filter_type = self.filter_var.get()
-                    if filter_type == 'magic-kernel':
-                        try:
-                            print("\nAttempting MagicKernelSharp2021 scaling...")
-                            wand_img.artifacts['filter:filter'] = 'MagicKernelSharp2021'
-                            wand_img.artifacts['filter:support'] = '1.0'
-                            wand_img.artifacts['filter:window'] = 'Box'
-                            wand_img.artifacts['filter:lobes'] = '2'
-                            wand_img.artifacts['filter:blur'] = '0.8'
-                            wand_img.resize(new_width, new_height)
-                            print("Successfully used MagicKernelSharp2021")
-                        except Exception as e1:
-                            print(f"MagicKernelSharp2021 failed: {str(e1)}")
-                            try:
-                                print("Trying MagicKernelSharp2013...")
-                                wand_img.artifacts['filter:filter'] = 'MagicKernelSharp2013'
-                                wand_img.resize(new_width, new_height)
-                                print("Successfully used MagicKernelSharp2013")
-                            except Exception as e2:
-                                print(f"MagicKernelSharp2013 failed: {str(e2)}")
-                                print("Falling back to mitchell filter...")
-                                wand_img.resize(new_width, new_height, filter='mitchell', blur=0.75)
-                                print("Successfully used Mitchell filter")
-                    elif filter_type == 'point':
-                        wand_img.resize(new_width, new_height, filter='point')
-                    else:
-                        wand_img.resize(new_width, new_height, filter='lanczos', blur=0.9)
-                    img_buffer = BytesIO(wand_img.make_blob('png'))
-                    scaled_frame = Image.open(img_buffer).convert('RGBA')
-                    # Quantize alpha channel to remove semi-transparent pixels from scaling interpolation
-                    scaled_frame = self._quantize_alpha_channel(scaled_frame)
-                    pixels = scaled_frame.load()
-                    for y in range(scaled_frame.height):
-                        for x in range(scaled_frame.width):
-                            r, g, b, a = pixels[x, y]
-                            if transparency_color_palette: # Use palette handler's color
-                                ttol = getattr(self.palette_handler, 'transparency_tolerance', 0)
-                                if a == 0 or (ttol > 0 and abs(r - transparency_color_palette[0]) <= ttol and abs(g - transparency_color_palette[1]) <= ttol and abs(b - transparency_color_palette[2]) <= ttol) or (ttol <= 0 and (r, g, b) == transparency_color_palette):
-                                    pixels[x, y] = transparency_color_palette + (255,)
-                                else:
-                                    pixels[x, y] = (r, g, b, 255)
-                            else:
-                                if a == 0:
-                                    pixels[x, y] = (0, 0, 0, 0)
-                                else:
-                                    pixels[x, y] = (r, g, b, 255)
-                    scaled_frames.append(scaled_frame.copy())
-            self.preview_viewer.load_frames(scaled_frames)
-            if len(scaled_frames) == len(image_paths):
-                self.preview_viewer.set_image_paths(image_paths)
-            else:
-                logging.warning("Frame count changed after scaling; not all original filenames can be preserved.")
-                self.preview_viewer.set_image_paths([None] * len(scaled_frames))
-            # Update _original_preview_frames to the newly scaled frames
-            self._original_preview_frames = [frame.copy() for frame in scaled_frames]
-            self.preview_refresh_btn.invoke()  # Simulate refresh button press
-            if self.scaled_palette_handler.palette_colors is not None:
-                new_frames = []
-                for frame in scaled_frames:
-                    new_frames.append(self.scaled_palette_handler.apply_palette_to_image(frame))
-                self.preview_viewer.load_frames(new_frames)
-                if len(new_frames) == len(image_paths):
-                    self.preview_viewer.set_image_paths(image_paths)
+    def _can_process_and_save(self):
+        """True when a streaming save can start: no other one running, frames loaded and a save folder picked."""
+        if getattr(self, '_save_job_running', False):
+            return False
+        if not self.preview_viewer.frames:
+            messagebox.showwarning("Warning", "No frames loaded.")
+            return False
+        save_folder = getattr(self, 'save_folder', None)
+        if not save_folder or not isinstance(save_folder, str) or not os.path.isdir(save_folder):
+            messagebox.showwarning("Pick a folder", "Please pick a folder to save images first.")
+            return False
+        return True
+
+    def _process_and_save(self, frames, process, title, message, done_text, sheet_scale):
+        """Process frames and write them to the save folder in one streaming pass.
+
+        process(chunk) turns a chunk of frames into finished frames. They go
+        straight to export.save_images, so processing and PNG encoding overlap
+        and only a chunk plus the frames being encoded are held in memory;
+        nothing is loaded into the viewer. Output names and options are the
+        same as Save Image(s). GIF animations need every frame at once, so they
+        are processed first and then saved with _save_frames. Call
+        _can_process_and_save first."""
+        import threading
+        save_folder = self.save_folder
+        original_paths = self._resolve_save_paths(frames)
+        save_options = self._save_options()
+        if save_options is None:
+            return
+        total = len(frames)
+
+        self._save_job_running = True
+        self._cancel_save_job = False
+        loading_win = tk.Toplevel(self.root)
+        loading_win.title(title)
+        loading_win.geometry("320x100")
+        loading_win.transient(self.root)
+        loading_win.grab_set()
+        tk.Label(loading_win, text=message, font=("Segoe UI", 11)).pack(pady=10)
+        progress_var = tk.StringVar(value="0 / {}".format(total))
+        tk.Label(loading_win, textvariable=progress_var).pack()
+        def on_cancel():
+            self._cancel_save_job = True
+            progress_var.set("Cancelling...")
+        ttk.Button(loading_win, text="Cancel", command=on_cancel).pack(pady=5)
+        loading_win.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        def worker():
+            written = [0]
+            anim_path = None
+            counts = None
+            error = None
+            cancelled = lambda: self._cancel_save_job
+            def progress(done):
+                written[0] = done
+                self.root.after(0, lambda: progress_var.set(f"{done} / {total}"))
+            try:
+                if self._saves_as_animation(original_paths):
+                    finished = []
+                    for start in range(0, total, self.SCALE_CHUNK):
+                        if cancelled():
+                            break
+                        finished.extend(process(self._frame_chunk(frames, start, self.SCALE_CHUNK)))
+                        progress(len(finished))
+                    if not cancelled():
+                        anim_path, counts = self._save_frames(finished, original_paths, save_folder, **save_options)
                 else:
-                    logging.warning("Frame count changed after palette application; not all original filenames can be preserved.")
-                    self.preview_viewer.set_image_paths([None] * len(new_frames))
-                # Also update _original_preview_frames to the palette-applied frames
-                self._original_preview_frames = [frame.copy() for frame in new_frames]
-            logging.info(f"Applied {filter_type} scaling: {scale_percent}%")
-        except Exception as e:
-            logging.error(f"Error applying scale: {e}")
-            messagebox.showerror("Error", f"Failed to apply scaling: {str(e)}")
-            # If an error occurs, revert the undo stack to prevent saving a broken state
-            if self._scale_undo_stack:
-                self._scale_undo_stack.pop()
+                    frame_paths = self._frame_save_paths(frames, original_paths, save_folder)
+                    prepared = self._iter_processed_for_save(frames, process, save_options, cancelled)
+                    if save_options['indexed']:
+                        prepared = self._iter_indexed(prepared, frame_paths, self.palette_handler.transparency_color)
+                    background = self._sheet_background(
+                        self.palette_handler.transparency_color, save_options['put_back_transparency'],
+                        save_options['replace_transparent'], save_options['replacement_color']
+                    )
+                    counts = export.save_images(
+                        self._iter_save_jobs(prepared, frame_paths, original_paths, save_folder, background, sheet_scale),
+                        compress_level=save_options['compress_level'], optimize=save_options['optimize'],
+                        progress=progress, cancelled=cancelled, incremental=save_options['incremental'],
+                        prune=save_options['prune']
+                    )
+            except Exception as e:
+                logging.error(f"Error in {title}: {e}", exc_info=True)
+                error = e
+
+            def on_done():
+                self._save_job_running = False
+                loading_win.grab_release()
+                loading_win.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"{title} failed: {error}")
+                elif self._cancel_save_job:
+                    logging.info(f"{title} cancelled after {written[0]} of {total} frames")
+                    messagebox.showinfo("Cancelled", f"Cancelled after {written[0]} of {total} frames.")
+                elif anim_path:
+                    messagebox.showinfo("Success", f"Animation saved as {anim_path}")
+                else:
+                    summary = f"{counts['written']} written, {counts['skipped']} unchanged, {counts['deleted']} deleted"
+                    messagebox.showinfo("Success", f"{total} frames {done_text} and saved to {save_folder}!\n({summary})")
+                    logging.info(f"{title}: {done_text}, saved to {save_folder} ({summary})")
+            self.root.after(0, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def scale_and_save(self):
+        """Scale the current frames and write them to the save folder as they finish (see _process_and_save)."""
+        if not self._can_process_and_save():
+            return
+        # Warn if a palette is loaded, as apply_scale does
+        if self.palette_handler.palette_colors is not None:
+            if not messagebox.askokcancel("Palette Warning", "A palette is loaded, if you continue it will apply the palette too"):
+                return
+        scale_percent = self._read_scale_percent()
+        if scale_percent is None:
+            return
+        scale_factor = scale_percent / 100.0
+        filter_type = self.filter_var.get()
+        tiled = self.tiled_scale_var.get()
+
+        def process(chunk):
+            scaled = self._scale_frames(chunk, scale_factor, filter_type, tiled)
+            return self._finalize_scaled_frames(scaled, palette_handler=self.scaled_palette_handler, remember=False)
+
+        self._process_and_save(
+            self._snapshot_frames(self.preview_viewer.frames), process, "Scale & Save",
+            f"Scaling to {scale_percent:g}% and saving...",
+            f"scaled to {scale_percent:g}% ({filter_type})", self._frames_scale * scale_factor
+        )
+
+    def color_change_and_save(self):
+        """Apply the color change to every frame and write the results to the save folder as
+        they finish (see _process_and_save), instead of loading them into the viewer."""
+        if not self.picked_color:
+            messagebox.showwarning("Warning", "Please pick a color.")
+            return
+        if not self._can_process_and_save():
+            return
+        adjust = self._color_change_func()
+        base_frames = getattr(self, '_original_preview_frames', None) or self.preview_viewer.frames
+        self._process_and_save(
+            self._snapshot_frames(base_frames), lambda chunk: [adjust(frame) for frame in chunk],
+            "Color Change & Save", "Applying color change and saving...", "color changed", self._frames_scale
+        )
+
+    def outline_and_save(self):
+        """Outline every frame and write the results to the save folder as they finish
+        (see _process_and_save), instead of loading them into the viewer."""
+        import outlining
+        settings = outlining.outline_settings(self)
+        if settings is None or not self._can_process_and_save():
+            return
+        base_frames = getattr(self, '_original_preview_frames', None) or self.preview_viewer.frames
+        self._process_and_save(
+            self._snapshot_frames(base_frames),
+            lambda chunk: [outlining.outline_frame(frame, settings) for frame in chunk],
+            "Outline & Save", "Applying outlining and saving...", "outlined", self._frames_scale
+        )
 
     def undo_scale_apply(self):
         if not self._scale_undo_stack:
             messagebox.showinfo("Undo Scale", "Nothing to undo in scaling.")
             return
         # Save current state for redo
-        self._scale_redo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._scale_redo_stack.append((self._copy_frames(self.preview_viewer.frames), self._frames_scale))
         # Pop previous state from undo stack
-        prev_frames = self._scale_undo_stack.pop()
+        prev_frames, self._frames_scale = self._scale_undo_stack.pop()
         # Restore frame index
         cur_idx = self.preview_viewer.current_frame_index if hasattr(self.preview_viewer, 'current_frame_index') else 0
-        self.preview_viewer.load_frames([frame.copy() for frame in prev_frames])
-        self._original_preview_frames = [frame.copy() for frame in prev_frames]
+        self.preview_viewer.load_frames(self._copy_frames(prev_frames))
+        self._original_preview_frames = self._copy_frames(prev_frames)
         # Restore frame index if possible
         if 0 <= cur_idx < len(prev_frames):
             self.preview_viewer.current_frame_index = cur_idx
@@ -1717,13 +2569,13 @@ class NewToolApp:
             messagebox.showinfo("Redo Scale", "Nothing to redo in scaling.")
             return
         # Save current state for undo
-        self._scale_undo_stack.append([frame.copy() for frame in self.preview_viewer.frames])
+        self._scale_undo_stack.append((self._copy_frames(self.preview_viewer.frames), self._frames_scale))
         # Pop next state from redo stack
-        next_frames = self._scale_redo_stack.pop()
+        next_frames, self._frames_scale = self._scale_redo_stack.pop()
         # Restore frame index
         cur_idx = self.preview_viewer.current_frame_index if hasattr(self.preview_viewer, 'current_frame_index') else 0
-        self.preview_viewer.load_frames([frame.copy() for frame in next_frames])
-        self._original_preview_frames = [frame.copy() for frame in next_frames]
+        self.preview_viewer.load_frames(self._copy_frames(next_frames))
+        self._original_preview_frames = self._copy_frames(next_frames)
         if 0 <= cur_idx < len(next_frames):
             self.preview_viewer.current_frame_index = cur_idx
         self.update_preview_with_bg()
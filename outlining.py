@@ -102,13 +102,11 @@ def update_outline_color_canvas(app, which):
     canvas = app.outline_color1_canvas if which == 1 else app.outline_color2_canvas
     canvas.config(bg="#%02x%02x%02x" % color)
 
-def apply_outlining(app):
+def outline_settings(app):
+    """Read and check the outlining controls; returns the settings for outline_frame, or None after showing why not."""
     if not app.outline_enabled_var.get():
         messagebox.showinfo("Outlining", "Enable outlining to apply.")
-        return
-    # Always use the original preview frames for outlining
-    if not hasattr(app, '_original_preview_frames'):
-        app._original_preview_frames = [frame.copy() for frame in app.preview_viewer.frames]
+        return None
     color1 = app.outline_color1
     use_gradient = app.outline_use_gradient_var.get()
     color2 = app.outline_color2 if use_gradient else app.outline_color1
@@ -117,14 +115,14 @@ def apply_outlining(app):
     transparency_color = getattr(app, 'transparency_color', None)
     if transparency_color is None:
         messagebox.showerror("Outlining Error", "You must set a transparency color before outlining. Use the 'Transparency Color' button to pick the background color of your sprite.")
-        return
+        return None
     # Consider transparency tolerance: if outline color is within tolerance of transparency color, it's effectively invisible
     ttol = int(getattr(app.palette_handler, 'transparency_tolerance', 0))
     def _within_tol(ca, cb, tol):
         return abs(ca[0] - cb[0]) <= tol and abs(ca[1] - cb[1]) <= tol and abs(ca[2] - cb[2]) <= tol
     if _within_tol(color1, transparency_color, ttol) or (use_gradient and _within_tol(color2, transparency_color, ttol)):
         messagebox.showerror("Outlining Error", "Outline color must not match (within tolerance) the transparency color! Please pick a different outline color.")
-        return
+        return None
     # Robustly get amount and thickness, fallback to defaults if blank/invalid
     try:
         amount = int(app.outline_amount_var.get())
@@ -135,6 +133,41 @@ def apply_outlining(app):
     except Exception:
         thickness = 1
     side = app.outline_side_var.get() if hasattr(app, 'outline_side_var') else 'outside'
+    return {
+        'color1': color1, 'color2': color2, 'use_gradient': use_gradient, 'direction': direction,
+        'amount': amount, 'thickness': thickness, 'side': side,
+        'transparency_color': transparency_color, 'tolerance': ttol,
+    }
+
+def outline_frame(frame, settings):
+    """Outline one frame with outline_settings() settings; returns an RGBA image of the same size."""
+    # Step 1: Make original transparency color transparent (alpha 0)
+    frame_for_outline = apply_transparency_color(frame, settings['transparency_color'], settings['tolerance'])
+    # Step 2: Pad the image with a transparent border
+    padded = pad_image_with_transparent_border(frame_for_outline, border=2)
+    # Step 3: Apply outlining. This should return an RGBA image where only sprite+outline are opaque.
+    outlined = outline_image(
+        padded,
+        settings['color1'],
+        settings['color2'],
+        settings['use_gradient'],
+        settings['direction'],
+        settings['amount'],
+        settings['thickness'],
+        settings['side'],
+        transparency_color=settings['transparency_color'] # For debug/internal masking within outline_image
+    )
+    # Step 4: Crop back to original size (remove border)
+    w, h = frame_for_outline.size
+    return outlined.crop((2, 2, 2 + w, 2 + h))
+
+def apply_outlining(app):
+    settings = outline_settings(app)
+    if settings is None:
+        return
+    # Always use the original preview frames for outlining
+    if not hasattr(app, '_original_preview_frames'):
+        app._original_preview_frames = app._copy_frames(app.preview_viewer.frames)
     # Show loading window
     app._cancel_apply_outline = False
     loading_win = tk.Toplevel(app.root)
@@ -150,40 +183,21 @@ def apply_outlining(app):
         app._cancel_apply_outline = True
     cancel_btn = ttk.Button(loading_win, text="Cancel", command=on_cancel)
     cancel_btn.pack(pady=5)
+    sink = app._new_frame_sink()
 
     def worker():
-        new_frames = []
+        new_frames = sink
         total = len(app._original_preview_frames)
-        transparency_color = getattr(app, 'transparency_color', None)
         for i, frame in enumerate(app._original_preview_frames):
             if app._cancel_apply_outline:
                 break
-            # Step 1: Make original transparency color transparent (alpha 0)
-            ttol = int(getattr(app.palette_handler, 'transparency_tolerance', 0))
-            frame_for_outline = apply_transparency_color(frame, transparency_color, ttol)
-            # Step 2: Pad the image with a transparent border
-            padded = pad_image_with_transparent_border(frame_for_outline, border=2)
-            # Step 3: Apply outlining. This should return an RGBA image where only sprite+outline are opaque.
-            outlined = outline_image(
-                padded,
-                color1,
-                color2,
-                use_gradient,
-                direction,
-                amount,
-                thickness,
-                side,
-                transparency_color=transparency_color # For debug/internal masking within outline_image
-            )
-            # Step 4: Crop back to original size (remove border)
-            w, h = frame_for_outline.size
-            outlined_cropped = outlined.crop((2, 2, 2 + w, 2 + h))
-            new_frames.append(outlined_cropped)
+            new_frames.append(outline_frame(frame, settings))
             progress_var.set(f"{i+1} / {total}")
         def on_done():
             loading_win.grab_release()
             loading_win.destroy()
             if app._cancel_apply_outline:
+                app._release_frame_stacks()
                 messagebox.showinfo("Cancelled", "Outlining cancelled.")
                 return
             app.preview_viewer.load_frames(new_frames)
@@ -192,7 +206,8 @@ def apply_outlining(app):
             
 
             
-            app._original_preview_frames = [frame.copy() for frame in new_frames]
+            app._original_preview_frames = app._copy_frames(new_frames)
+            app._release_frame_stacks()
             print("[DEBUG] Outlining applied, preview and originals updated.", file=sys.stderr)
             messagebox.showinfo("Done", "Outlining applied to all frames.")
         app.root.after(0, on_done)
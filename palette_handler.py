@@ -1,6 +1,7 @@
 import numpy as np
 from PIL import Image
 import logging
+import threading
 from sklearn.cluster import KMeans
 import colorsys
 from skimage import color
@@ -117,6 +118,15 @@ class PaletteHandler:
         self.transparency_tolerance = 0
         self.original_images = {}  # Store original images before palette application
         self.next_image_id = 0  # Counter for generating unique image IDs
+        # Guards the ID counter and the colour lookup (frames are mapped from worker threads)
+        self._lock = threading.Lock()
+        self._reset_color_lookup()
+
+    def _reset_color_lookup(self):
+        """Forget memoized colour -> palette index results (call when the palette changes)."""
+        with self._lock:
+            # (sorted packed 0xRRGGBB keys, palette indices), always replaced together
+            self._lookup = (np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.intp))
         
     def get_image_id(self, img):
         """Generate or retrieve a unique ID for an image."""
@@ -125,8 +135,9 @@ class PaletteHandler:
             return img.palette_handler_id
         
         # Create new ID and store it in image metadata
-        new_id = f"img_{self.next_image_id}"
-        self.next_image_id += 1
+        with self._lock:
+            new_id = f"img_{self.next_image_id}"
+            self.next_image_id += 1
         img.palette_handler_id = new_id
         return new_id
     
@@ -158,6 +169,7 @@ class PaletteHandler:
             
             # Store RGB colors
             self.palette_colors = colors
+            self._reset_color_lookup()
             
             # Convert to LAB color space for better matching
             # Normalize RGB values to 0-1 range for skimage
@@ -183,6 +195,54 @@ class PaletteHandler:
         self.palette_colors = None
         self.palette_colors_lab = None
         self.transparency_color = None
+        self._reset_color_lookup()
+
+    def palette_indices(self, rgb):
+        """Return the nearest palette index (LAB distance) for every pixel of an (..., 3) uint8 array.
+
+        Each distinct colour is matched once; results are memoized in a sorted
+        lookup table, so later frames (and other sizes of the same sprite) only
+        pay for colours they introduce. Safe to call from several threads."""
+        rgb = np.asarray(rgb, dtype=np.uint8)
+        keys = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+        unique_keys, inverse = np.unique(keys.ravel(), return_inverse=True)
+        lookup_keys, lookup_indices = self._lookup
+        pos = np.searchsorted(lookup_keys, unique_keys)
+        found = pos < len(lookup_keys)
+        found[found] = lookup_keys[pos[found]] == unique_keys[found]
+        missing = unique_keys[~found]
+        if missing.size:
+            missing_rgb = np.stack([(missing >> 16) & 255, (missing >> 8) & 255, missing & 255], axis=1)
+            lab = color.rgb2lab((missing_rgb.astype(np.float32) / 255.0).reshape(-1, 1, 3)).reshape(-1, 3)
+            distances = np.sqrt(((lab[:, np.newaxis] - self.palette_colors_lab) ** 2).sum(axis=2))
+            with self._lock:
+                # Another thread may have added some of the same colours meanwhile
+                all_keys = np.concatenate([self._lookup[0], missing])
+                all_indices = np.concatenate([self._lookup[1], np.argmin(distances, axis=1)])
+                all_keys, first = np.unique(all_keys, return_index=True)
+                self._lookup = (all_keys, all_indices[first])
+                lookup_keys, lookup_indices = self._lookup
+            pos = np.searchsorted(lookup_keys, unique_keys)
+        return lookup_indices[pos][inverse].reshape(keys.shape)
+
+    def map_array_to_palette(self, arr):
+        """Apply transparency and the palette to an (H, W, 4) uint8 RGBA array in place.
+
+        Same result as apply_palette_to_image, for callers that already hold the
+        pixels as an array (e.g. right after scaling)."""
+        if self.transparency_color:
+            ttol = int(getattr(self, 'transparency_tolerance', 0))
+            diffs = np.abs(arr[..., :3].astype(int) - np.array(self.transparency_color, dtype=int))
+            arr[np.all(diffs <= max(ttol, 0), axis=-1), 3] = 0
+        if self.palette_colors is not None:
+            arr[..., :3] = self.palette_colors[self.palette_indices(arr[..., :3])]
+        return arr
+
+    def remember_original(self, img, original):
+        """Record original as the pre-palette version of img (used when the palette is changed or removed)."""
+        img_id = self.get_image_id(img)
+        self.original_images[img_id] = original
+        return img_id
     
     def apply_palette_to_image(self, img):
         """Convert image to use current palette."""
@@ -225,30 +285,10 @@ class PaletteHandler:
                 result.palette_handler_id = img_id  # Preserve the ID
                 return result
             
-            # Convert to LAB space and apply palette
+            # Map each distinct color to the closest palette color (LAB distance)
             img_data = np.array(result)
-            rgb_data = img_data[:, :, :3].astype(np.float32)  # Ensure float32 type
             alpha = img_data[:, :, 3]
-            
-            # Normalize RGB values to 0-1 range
-            rgb_norm = rgb_data / 255.0
-            
-            # Reshape for color conversion while preserving alpha
-            orig_shape = rgb_norm.shape
-            rgb_reshaped = rgb_norm.reshape(-1, 3)
-            
-            # Convert to LAB space
-            lab_data = color.rgb2lab(rgb_reshaped.reshape(-1, 1, 3)).reshape(-1, 3)
-            
-            # Calculate distances in LAB space
-            distances = np.sqrt(((lab_data[:, np.newaxis] - self.palette_colors_lab) ** 2).sum(axis=2))
-            closest_indices = np.argmin(distances, axis=1)
-            
-            # Map to closest palette colors (in RGB space)
-            mapped_colors = self.palette_colors[closest_indices]
-            
-            # Reshape back to image dimensions
-            mapped_rgb = mapped_colors.reshape(orig_shape)
+            mapped_rgb = self.palette_colors[self.palette_indices(img_data[:, :, :3])]
             
             # Create output image with alpha channel
             output_data = np.dstack((mapped_rgb, alpha))
@@ -0,0 +1,392 @@
+import logging
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage, sparse
+
+
+def magic_kernel_sharp_2013(x):
+    """Magic Kernel Sharp 2013 (support 2.5), vectorized over x."""
+    x = np.abs(np.asarray(x, dtype=np.float64))
+    return np.where(
+        x < 0.5, 0.625 + 1.75 * (0.5 - x) * (0.5 + x),
+        np.where(
+            x < 1.5, (1.0 - x) * (1.75 - x),
+            np.where(x < 2.5, -0.125 * (2.5 - x) * (2.5 - x), 0.0)
+        )
+    )
+
+
+def magic_kernel_sharp_2021(x):
+    """Magic Kernel Sharp 2021 (support 4.5), vectorized over x."""
+    x = np.abs(np.asarray(x, dtype=np.float64))
+    return np.select(
+        [x < 0.5, x < 1.5, x < 2.5, x < 3.5, x < 4.5],
+        [
+            577.0 / 576.0 - 239.0 / 144.0 * x * x,
+            1.0 / 144.0 * (140.0 * x * x - 379.0 * x + 239.0),
+            -1.0 / 144.0 * (24.0 * x * x - 113.0 * x + 130.0),
+            1.0 / 144.0 * (4.0 * x * x - 27.0 * x + 45.0),
+            -1.0 / 1152.0 * (2.0 * x - 9.0) * (2.0 * x - 9.0),
+        ],
+        0.0
+    )
+
+
+def lanczos3(x):
+    """Lanczos windowed sinc with 3 lobes (PIL's LANCZOS)."""
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(np.abs(x) < 3.0, np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+
+def box(x):
+    """Box kernel: area average when shrinking, nearest neighbour when enlarging."""
+    x = np.abs(np.asarray(x, dtype=np.float64))
+    return np.where(x < 0.5, 1.0, np.where(x == 0.5, 0.5, 0.0))
+
+
+def bicubic(x, a=-0.5):
+    """Keys cubic convolution kernel (PIL's BICUBIC uses a=-0.5)."""
+    x = np.abs(np.asarray(x, dtype=np.float64))
+    return np.where(
+        x < 1.0, ((a + 2.0) * x - (a + 3.0)) * x * x + 1.0,
+        np.where(x < 2.0, ((a * x - 5.0 * a) * x + 8.0 * a) * x - 4.0 * a, 0.0)
+    )
+
+
+# name -> (kernel, support, blur); 'point' is handled separately
+# 'lanczos' and 'bicubic-sharper' match the PIL filters apply_scale used before.
+# 'magic-kernel' and 'magic-kernel-2013' mirror the Wand artifacts set in
+# NewToolApp.apply_scale (filter:support=1.0, filter:blur=0.8, Box window), so
+# both backends produce the same result. The '-sharp-' entries are the
+# kernels at their natural support.
+FILTERS = {
+    'magic-kernel': (magic_kernel_sharp_2021, 1.0, 0.8),
+    'magic-kernel-2013': (magic_kernel_sharp_2013, 1.0, 0.8),
+    'magic-kernel-sharp-2021': (magic_kernel_sharp_2021, 4.5, 1.0),
+    'magic-kernel-sharp-2013': (magic_kernel_sharp_2013, 2.5, 1.0),
+    'lanczos': (lanczos3, 3.0, 1.0),
+    'bicubic-sharper': (bicubic, 2.0, 1.0),
+    'box': (box, 0.5, 1.0),
+}
+
+# Filters the batched engine understands (FILTERS plus nearest neighbour)
+ENGINE_FILTERS = tuple(FILTERS) + ('point',)
+
+# Filters with integer-ratio fast paths (pure indexing / reshape-mean)
+INTEGER_FILTERS = ('point', 'box')
+
+
+@lru_cache(maxsize=128)
+def weight_matrix(src_size, dst_size, filter_name):
+    """Return the (dst_size, src_size) sparse CSR matrix resampling one axis.
+
+    Contributions follow ImageMagick's resize.c: the kernel is widened by
+    src/dst when shrinking, taps are clipped to the image and each row is
+    normalized by the sum of its weights. 'point' picks the source pixel under
+    each destination pixel centre. Results are cached, so every frame of the
+    same size reuses the same matrix.
+    """
+    factor = dst_size / src_size
+    if filter_name == 'point':
+        src_idx = np.minimum(((np.arange(dst_size) + 0.5) / factor).astype(np.int64), src_size - 1)
+        return sparse.csr_matrix(
+            (np.ones(dst_size, dtype=np.float32), (np.arange(dst_size), src_idx)),
+            shape=(dst_size, src_size)
+        )
+
+    kernel, support, blur = FILTERS[filter_name]
+    scale = max(1.0 / factor, 1.0)
+    support = scale * support * blur
+    if support < 0.5:
+        support = 0.5
+        scale = 1.0
+
+    bisect = (np.arange(dst_size) + 0.5) / factor + 1e-12
+    start = np.maximum(bisect - support + 0.5, 0.0).astype(np.int64)
+    stop = np.minimum(bisect + support + 0.5, src_size).astype(np.int64)
+    taps = int(np.max(stop - start)) if dst_size else 0
+
+    idx = start[:, None] + np.arange(taps)[None, :]
+    valid = idx < stop[:, None]
+    weights = kernel((idx - bisect[:, None] + 0.5) / scale / blur)
+    weights = np.where(valid, weights, 0.0)
+    density = weights.sum(axis=1, keepdims=True)
+    density[density == 0.0] = 1.0
+    weights /= density
+
+    rows = np.broadcast_to(np.arange(dst_size)[:, None], idx.shape)
+    return sparse.csr_matrix(
+        (weights[valid].astype(np.float32), (rows[valid], idx[valid])), shape=(dst_size, src_size)
+    )
+
+
+def _apply_axis(data, weights, axis):
+    """Multiply one axis of an (N, H, W, C) array by a weight matrix in a single matmul."""
+    moved = np.moveaxis(data, axis, 0)
+    rest = moved.shape[1:]
+    out = weights @ moved.reshape(moved.shape[0], -1)
+    return np.moveaxis(np.asarray(out, dtype=np.float32).reshape((weights.shape[0],) + rest), 0, axis)
+
+
+def _unsharp_mask(data, radius=1.0, percent=150, threshold=3):
+    """Vectorized equivalent of PIL's ImageFilter.UnsharpMask over a frame stack."""
+    blurred = ndimage.gaussian_filter(data, sigma=(0, radius, radius, 0), mode='nearest')
+    diff = data - blurred
+    return np.where(np.abs(diff) >= threshold, data + diff * (percent / 100.0), data)
+
+
+def _integer_factor(src_size, dst_size):
+    """Return (up, down) when dst_size is a whole multiple or divisor of src_size, else None."""
+    if dst_size >= src_size and dst_size % src_size == 0:
+        return dst_size // src_size, 1
+    if src_size % dst_size == 0:
+        return 1, src_size // dst_size
+    return None
+
+
+def _box_reduce(stack, down_y, down_x):
+    """Alpha-weighted area average of down_y x down_x blocks via reshape-and-mean."""
+    n, height, width, channels = stack.shape
+    blocks = stack.reshape(n, height // down_y, down_y, width // down_x, down_x, channels).astype(np.float32)
+    alpha = blocks[..., 3:4]
+    colour = (blocks[..., :3] * alpha).sum(axis=(2, 4))
+    alpha = alpha.sum(axis=(2, 4))
+    out = np.zeros(colour.shape[:3] + (channels,), dtype=np.float32)
+    np.divide(colour, alpha, out=out[..., :3], where=alpha > 0)
+    out[..., 3:4] = alpha * (1.0 / (down_y * down_x))
+    return _to_uint8(out)
+
+
+def resize_integer(stack, new_width, new_height, filter_name='point'):
+    """Integer-ratio fast path for 'point' and 'box'; returns None if it does not apply.
+
+    Shrinking picks every k-th pixel (point, same pixel weight_matrix would
+    pick) or averages k x k blocks weighted by alpha (box). Enlarging
+    broadcasts each pixel to a k x k block and materializes it with a single
+    reshape, which is what both filters do at whole-number factors.
+    """
+    _, height, width = stack.shape[:3]
+    factor_y = _integer_factor(height, new_height)
+    factor_x = _integer_factor(width, new_width)
+    if filter_name not in INTEGER_FILTERS or factor_y is None or factor_x is None:
+        return None
+    (up_y, down_y), (up_x, down_x) = factor_y, factor_x
+    if down_y > 1 or down_x > 1:
+        if filter_name == 'point':
+            stack = stack[:, down_y // 2::down_y, down_x // 2::down_x]
+        else:
+            stack = _box_reduce(stack, down_y, down_x)
+    if up_y > 1 or up_x > 1:
+        n, height, width, channels = stack.shape
+        stack = np.broadcast_to(
+            stack[:, :, None, :, None], (n, height, up_y, width, up_x, channels)
+        ).reshape(n, height * up_y, width * up_x, channels)
+    return np.ascontiguousarray(stack)
+
+
+def resize_stack(stack, new_width, new_height, filter_name='magic-kernel'):
+    """Resize an (N, H, W, 4) uint8 RGBA frame stack.
+
+    The vertical and horizontal weight matrices are built once (and cached)
+    and each is applied to the whole stack with one matmul. Colour is
+    resampled premultiplied by alpha (as ImageMagick does), so fully
+    transparent pixels never bleed their RGB into the sprite edge.
+    Whole-number ratios with 'point' or 'box' skip the matmul entirely.
+    """
+    _, height, width = stack.shape[:3]
+    if filter_name not in ENGINE_FILTERS:
+        filter_name = 'lanczos'
+    fast = resize_integer(stack, new_width, new_height, filter_name)
+    if fast is not None:
+        return fast
+    weights_y = weight_matrix(height, new_height, filter_name) if new_height != height else None
+    weights_x = weight_matrix(width, new_width, filter_name) if new_width != width else None
+    return _resample(stack, weights_y, weights_x, filter_name)
+
+
+def _resample(stack, weights_y, weights_x, filter_name):
+    """Apply vertical/horizontal weight matrices (None skips that axis) to a uint8 stack."""
+    premultiply = filter_name != 'point'
+    data = stack.astype(np.float32)
+    if premultiply:
+        data[..., :3] *= data[..., 3:4] * (1.0 / 255.0)
+    if weights_y is not None:
+        data = _apply_axis(data, weights_y, axis=1)
+    if weights_x is not None:
+        data = _apply_axis(data, weights_x, axis=2)
+    if premultiply:
+        alpha = data[..., 3:4]
+        inv_alpha = np.zeros_like(alpha)
+        np.divide(255.0, alpha, out=inv_alpha, where=alpha > 0)
+        data[..., :3] *= inv_alpha
+    if filter_name == 'bicubic-sharper':
+        data = _unsharp_mask(np.rint(np.clip(data, 0, 255)))
+    return _to_uint8(data)
+
+
+def _to_uint8(data):
+    """Round and clip a float array to uint8 in place (rounds half up)."""
+    np.clip(data, 0.0, 255.0, out=data)
+    data += 0.5
+    return data.astype(np.uint8)
+
+
+# Output pixels of context the bicubic-sharper unsharp mask needs around a tile
+# (gaussian_filter truncates at 4 sigma, sigma = radius = 1)
+_UNSHARP_HALO = 4
+
+
+def _tile_window(weights, start, stop):
+    """Source range and sliced weights needed for output rows start:stop of one axis.
+
+    With weights None (axis not resized) the window is the output range itself.
+    Otherwise it spans the columns the rows touch, i.e. the tile plus a halo
+    of the filter support.
+    """
+    if weights is None:
+        return start, stop, None
+    rows = weights[start:stop]
+    src_start, src_stop = int(rows.indices.min()), int(rows.indices.max()) + 1
+    return src_start, src_stop, rows[:, src_start:src_stop]
+
+
+def mask_color(stack, transparency_color):
+    """Give pixels of exactly transparency_color alpha 0, in place; returns stack."""
+    if transparency_color:
+        key = np.asarray(transparency_color[:3], dtype=np.uint8)
+        stack[np.all(stack[..., :3] == key, axis=-1), 3] = 0
+    return stack
+
+
+def resize_tiled(arr, new_width, new_height, filter_name='magic-kernel', tile_size=512, workers=None,
+                 transparency_color=None):
+    """Resize one large (H, W, 4) uint8 image tile by tile into a preallocated output.
+
+    Each output tile reads only the source pixels its weight rows touch, so
+    the filter support acts as the overlap halo and tiles stitch seamlessly
+    (the result equals resize_array). Tiles run in a thread pool (the
+    matmuls release the GIL); float working memory is bounded by roughly
+    tile area x workers instead of the whole sheet. transparency_color is
+    keyed out per source window, as stack_frames does for whole frames.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    height, width = arr.shape[:2]
+    if filter_name not in ENGINE_FILTERS:
+        filter_name = 'lanczos'
+    if (filter_name in INTEGER_FILTERS and _integer_factor(height, new_height) is not None
+            and _integer_factor(width, new_width) is not None):
+        source = mask_color(arr[None].copy(), transparency_color) if transparency_color else arr[None]
+        return resize_integer(source, new_width, new_height, filter_name)[0]
+    weights_y = weight_matrix(height, new_height, filter_name) if new_height != height else None
+    weights_x = weight_matrix(width, new_width, filter_name) if new_width != width else None
+    halo = _UNSHARP_HALO if filter_name == 'bicubic-sharper' else 0
+    out = np.empty((new_height, new_width, arr.shape[2]), dtype=np.uint8)
+
+    def run(tile):
+        y0, x0 = tile
+        y1, x1 = min(y0 + tile_size, new_height), min(x0 + tile_size, new_width)
+        # Extend the output window so post-filters see their neighbours, then crop
+        ey0, ey1 = max(0, y0 - halo), min(new_height, y1 + halo)
+        ex0, ex1 = max(0, x0 - halo), min(new_width, x1 + halo)
+        sy0, sy1, wy = _tile_window(weights_y, ey0, ey1)
+        sx0, sx1, wx = _tile_window(weights_x, ex0, ex1)
+        window = arr[None, sy0:sy1, sx0:sx1]
+        if transparency_color:
+            window = mask_color(window.copy(), transparency_color)
+        result = _resample(window, wy, wx, filter_name)[0]
+        out[y0:y1, x0:x1] = result[y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+
+    tiles = [(y, x) for y in range(0, new_height, tile_size) for x in range(0, new_width, tile_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, tiles))
+    logging.info(f"Tiled {filter_name} resize {width}x{height} -> {new_width}x{new_height} ({len(tiles)} tiles)")
+    return out
+
+
+def resize_array(arr, new_width, new_height, filter_name='magic-kernel'):
+    """Resize a single (H, W, 4) uint8 RGBA array."""
+    return resize_stack(arr[None], new_width, new_height, filter_name)[0]
+
+
+def group_by_size(frames):
+    """Return {(width, height): [frame indices]} preserving frame order within each group."""
+    groups = {}
+    for i, frame in enumerate(frames):
+        groups.setdefault(frame.size, []).append(i)
+    return groups
+
+
+def resize_frames_tiled(frames, scale_factor, filter_name='magic-kernel', tile_size=512, workers=None,
+                        transparency_color=None):
+    """Scale PIL frames one at a time with resize_tiled (for sheets too big to resize whole)."""
+    scaled = []
+    for frame in frames:
+        new_width = max(1, int(frame.width * scale_factor))
+        new_height = max(1, int(frame.height * scale_factor))
+        arr = resize_tiled(np.asarray(frame.convert('RGBA')), new_width, new_height, filter_name, tile_size, workers,
+                           transparency_color)
+        scaled.append(Image.fromarray(arr, 'RGBA'))
+    return scaled
+
+
+def stack_frames(frames, transparency_color=None):
+    """Decode PIL frames once into {(width, height): (indices, (N, H, W, 4) uint8 stack)}.
+
+    With transparency_color set, pixels of exactly that colour get alpha 0
+    (what the ImageMagick path does before resizing). The result can be
+    reused for any number of target sizes. Frames whose stacks() gives
+    memory-mapped buckets (a disk-backed FrameStore) are used without
+    decoding; they are only copied when a colour has to be keyed out.
+    """
+    mapped = frames.stacks() if hasattr(frames, 'stacks') else None
+    if mapped is not None:
+        return {size: (indices, mask_color(stack.copy(), transparency_color) if transparency_color else stack)
+                for size, (indices, stack) in mapped.items()}
+    stacks = {}
+    for size, indices in group_by_size(frames).items():
+        stack = np.stack([np.asarray(frames[i].convert('RGBA')) for i in indices])
+        stacks[size] = (indices, mask_color(stack, transparency_color))
+    return stacks
+
+
+def resize_frames(frames, scale_factor, filter_name='magic-kernel', stacks=None):
+    """Scale a list of PIL frames, batching all frames that share a size.
+
+    stacks is an optional stack_frames() result so several scale factors can
+    share one decode. Returns RGBA PIL images in the original order.
+    """
+    if stacks is None:
+        stacks = stack_frames(frames)
+    scaled = [None] * len(frames)
+    for (width, height), (indices, stack) in stacks.items():
+        new_width = max(1, int(width * scale_factor))
+        new_height = max(1, int(height * scale_factor))
+        out = resize_stack(stack, new_width, new_height, filter_name)
+        for i, arr in zip(indices, out):
+            scaled[i] = Image.fromarray(arr, 'RGBA')
+        logging.info(f"Resized {len(indices)} frame(s) {width}x{height} -> {new_width}x{new_height} ({filter_name})")
+    return scaled
+
+
+def finalize_alpha(arr, threshold=128, fill_color=None, tolerance=0):
+    """Binarize alpha and restore the transparency colour of scaled pixels, in place.
+
+    Works on a single (H, W, 4) uint8 RGBA array or an (N, H, W, 4) stack.
+    Alpha >= threshold becomes fully opaque, anything below fully transparent.
+    With fill_color set, transparent pixels and pixels within tolerance
+    (per channel) of fill_color become opaque fill_color, so the sprite keeps
+    its background colour; without it transparent pixels become (0, 0, 0, 0).
+    """
+    transparent = arr[..., 3] < threshold
+    if fill_color is not None:
+        diff = np.abs(arr[..., :3].astype(np.int16) - np.asarray(fill_color, dtype=np.int16))
+        transparent |= np.all(diff <= max(int(tolerance), 0), axis=-1)
+        arr[..., 3] = 255
+        arr[transparent, :3] = fill_color
+    else:
+        arr[..., 3] = 255
+        arr[transparent] = 0
+    return arr
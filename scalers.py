@@ -0,0 +1,169 @@
+import logging
+import threading
+
+import numpy as np
+from PIL import Image
+
+import pixel_art
+import resampling
+
+# ImageMagick settings tried, in order, for each filter name. The first one
+# that survives a probe resize is used; if none does the NumPy engine is used.
+MAGIC_KERNEL_ARTIFACTS = {
+    'filter:support': '1.0',
+    'filter:window': 'Box',
+    'filter:lobes': '2',
+    'filter:blur': '0.8',
+}
+WAND_CANDIDATES = {
+    'magic-kernel': [
+        ('MagicKernelSharp2021', {'artifacts': dict(MAGIC_KERNEL_ARTIFACTS, **{'filter:filter': 'MagicKernelSharp2021'})}),
+        ('MagicKernelSharp2013', {'artifacts': dict(MAGIC_KERNEL_ARTIFACTS, **{'filter:filter': 'MagicKernelSharp2013'})}),
+    ],
+    'lanczos': [('lanczos', {'filter': 'lanczos', 'blur': 0.9})],
+}
+# Filters without their own entry keep the old behaviour of the Wand branch
+WAND_DEFAULT = 'lanczos'
+
+
+def wand_scale_frames(wand_image, frames, scale_factor, options, transparency_color=None):
+    """Scale frames with ImageMagick through a single Wand image sequence.
+
+    Frames are handed to Wand as raw RGBA buffers and read back from one raw
+    RGBA blob, so no PNG encode/decode happens per frame. options holds either
+    'artifacts' (set before resizing) or 'filter'/'blur' keyword arguments for
+    resize(). Returns RGBA PIL images.
+    """
+    frames = [frame if frame.mode == 'RGBA' else frame.convert('RGBA') for frame in frames]
+    sizes = [(max(1, int(f.width * scale_factor)), max(1, int(f.height * scale_factor))) for f in frames]
+    resize_kwargs = {k: v for k, v in options.items() if k != 'artifacts'}
+    with wand_image() as sequence:
+        for frame in frames:
+            arr = np.asarray(frame)
+            if transparency_color:
+                # Same as wand transparent_color(..., alpha=0, fuzz=0), done before upload
+                arr = arr.copy()
+                arr[np.all(arr[..., :3] == transparency_color, axis=-1), 3] = 0
+            sequence.read(blob=arr.tobytes(), format='rgba', width=frame.width, height=frame.height, depth=8)
+
+        for i, (new_width, new_height) in enumerate(sizes):
+            with sequence.sequence[i] as wand_img:
+                for key, value in options.get('artifacts', {}).items():
+                    wand_img.artifacts[key] = value
+                wand_img.resize(new_width, new_height, **resize_kwargs)
+
+        sequence.depth = 8
+        blob = memoryview(sequence.make_blob('rgba'))
+        expected = sum(w * h * 4 for w, h in sizes)
+        if len(blob) != expected:
+            # Some ImageMagick builds only write the first image of a raw blob
+            logging.warning(f"Raw RGBA blob has {len(blob)} bytes, expected {expected}; exporting frames individually")
+            return [
+                Image.frombytes('RGBA', size, bytes(sequence.sequence[i].export_pixels(channel_map='RGBA', storage='char')))
+                for i, size in enumerate(sizes)
+            ]
+
+    scaled_frames = []
+    offset = 0
+    for size in sizes:
+        n = size[0] * size[1] * 4
+        scaled_frames.append(Image.frombytes('RGBA', size, blob[offset:offset + n]))
+        offset += n
+    return scaled_frames
+
+
+class Scaler:
+    """A resolved scaling implementation for one filter name."""
+
+    def __init__(self, filter_name, backend, func):
+        self.filter_name = filter_name
+        self.backend = backend  # human readable, e.g. 'ImageMagick MagicKernelSharp2021'
+        self._func = func
+
+    def scale(self, frames, scale_factor, transparency_color=None, stacks=None):
+        """Scale a list of PIL frames; returns RGBA PIL images in the same order.
+
+        Pixels of transparency_color are made transparent before resampling.
+        stacks (from resampling.stack_frames, already masked) lets NumPy
+        backends skip decoding when the same frames are scaled repeatedly.
+        """
+        return self._func(frames, scale_factor, transparency_color, stacks)
+
+    def __repr__(self):
+        return f"Scaler({self.filter_name!r}, {self.backend!r})"
+
+
+class ScalerRegistry:
+    """Chooses a backend per filter name once and then dispatches straight to it.
+
+    Pixel-art filters always use pixel_art and point/box always use the NumPy
+    engine. Other filters probe the ImageMagick candidates in WAND_CANDIDATES
+    with a tiny test resize the first time the filter is requested (or when
+    probe_all resolves them up front); the first that works is cached,
+    otherwise the NumPy engine is used. Thread safe, so the background
+    scaling job can resolve filters too.
+    """
+
+    def __init__(self, wand_image=None):
+        self._wand_image = wand_image
+        self._scalers = {}
+        self._lock = threading.Lock()
+
+    def get(self, filter_name):
+        """Return the cached Scaler for filter_name, probing backends on first use."""
+        with self._lock:
+            scaler = self._scalers.get(filter_name)
+            if scaler is None:
+                scaler = self._resolve(filter_name)
+                self._scalers[filter_name] = scaler
+                logging.info(f"Scaling filter '{filter_name}' uses {scaler.backend}")
+            return scaler
+
+    def probe_all(self, filter_names):
+        """Resolve several filters up front (e.g. every filter offered in the UI)."""
+        return {name: self.get(name) for name in filter_names}
+
+    def _resolve(self, filter_name):
+        if filter_name in pixel_art.FILTERS:
+            return Scaler(filter_name, f"pixel art {pixel_art.FILTERS[filter_name]}",
+                          lambda frames, factor, tc, stacks:
+                          pixel_art.upscale_frames(frames, factor, filter_name, stacks or resampling.stack_frames(frames, tc)))
+        if self._wand_image is not None and filter_name not in resampling.INTEGER_FILTERS:
+            candidates = WAND_CANDIDATES.get(filter_name, WAND_CANDIDATES[WAND_DEFAULT])
+            for label, options in candidates:
+                if self._probe_wand(options):
+                    return Scaler(filter_name, f"ImageMagick {label}",
+                                  lambda frames, factor, tc, _stacks, options=options:
+                                  wand_scale_frames(self._wand_image, frames, factor, options, tc))
+                logging.warning(f"ImageMagick filter {label} unavailable for '{filter_name}'")
+        engine_filter = filter_name if filter_name in resampling.ENGINE_FILTERS else 'lanczos'
+        return Scaler(filter_name, f"NumPy {engine_filter}",
+                      lambda frames, factor, tc, stacks:
+                      resampling.resize_frames(frames, factor, engine_filter, stacks or resampling.stack_frames(frames, tc)))
+
+    def _probe_wand(self, options):
+        """Resize a small noise image with the options; True if ImageMagick applies them.
+
+        ImageMagick silently ignores a 'filter:filter' artifact it does not
+        know and falls back to its default filter, so the result is compared
+        with the same resize without that artifact: identical output means
+        the filter is not available in this build.
+        """
+        rng = np.random.default_rng(0)
+        probe = rng.integers(0, 256, size=(8, 8, 4), dtype=np.uint8)
+        probe[..., 3] = 255
+        frames = [Image.fromarray(probe, 'RGBA')]
+        artifacts = options.get('artifacts', {})
+        try:
+            result = wand_scale_frames(self._wand_image, frames, 0.625, options)[0]
+            if 'filter:filter' not in artifacts:
+                return True
+            fallback = dict(options, artifacts={k: v for k, v in artifacts.items() if k != 'filter:filter'})
+            reference = wand_scale_frames(self._wand_image, frames, 0.625, fallback)[0]
+        except Exception as e:
+            logging.debug(f"ImageMagick probe failed for {options}: {e}")
+            return False
+        if np.array_equal(np.asarray(result), np.asarray(reference)):
+            logging.debug(f"ImageMagick ignored filter {artifacts['filter:filter']}")
+            return False
+        return True
@@ -0,0 +1,134 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+
+# Save-path entry of a frame cut from a sheet. Still a (path, index) tuple, so it is
+# named like a GIF frame, but its own type keeps it apart from GIF frame entries.
+SheetCell = namedtuple('SheetCell', ['path', 'index'])
+
+
+def grid_cells(width, height, cell_width, cell_height, margin=0, spacing=0):
+    """(x, y, w, h) of every whole cell of a regular grid, row by row."""
+    cells = []
+    for y in range(margin, height - cell_height + 1, cell_height + spacing):
+        for x in range(margin, width - cell_width + 1, cell_width + spacing):
+            cells.append((x, y, cell_width, cell_height))
+    return cells
+
+
+def foreground_mask(arr, transparency_color=None):
+    """True where an (H, W, 4) sheet has sprite pixels: alpha > 0 and not transparency_color."""
+    mask = arr[..., 3] > 0
+    if transparency_color is not None:
+        mask &= np.any(arr[..., :3] != np.asarray(transparency_color, dtype=np.uint8), axis=-1)
+    return mask
+
+
+def _reading_order(boxes):
+    """Sort boxes into rows (vertically overlapping boxes share a row), each row left to right."""
+    rows = []
+    for box in sorted(boxes, key=lambda b: (b[1], b[0])):
+        if rows and box[1] < rows[-1][0]:
+            rows[-1][0] = max(rows[-1][0], box[3])
+            rows[-1][1].append(box)
+        else:
+            rows.append([box[3], [box]])
+    return [box for _, row in rows for box in sorted(row)]
+
+
+def detect_cells(arr, transparency_color=None, merge_gap=1, min_area=4):
+    """Find sprites on a sheet as 8-connected components of the foreground mask.
+
+    Components up to 2 * merge_gap pixels apart are merged (so a detached
+    sword or shadow stays with its sprite): they are labelled on the mask
+    dilated by merge_gap, and boxes are taken over the undilated pixels.
+    Boxes with fewer than min_area pixels are dropped as noise.
+    Returns (x, y, w, h) cells in reading order.
+    """
+    mask = foreground_mask(arr, transparency_color)
+    structure = np.ones((3, 3), dtype=bool)
+    grouped = ndimage.binary_dilation(mask, structure, iterations=merge_gap) if merge_gap > 0 else mask
+    labels, count = ndimage.label(grouped, structure=structure)
+    labels[~mask] = 0
+    boxes = [(s[1].start, s[0].start, s[1].stop, s[0].stop) for s in ndimage.find_objects(labels) if s is not None]
+    boxes = [b for b in boxes if (b[2] - b[0]) * (b[3] - b[1]) >= min_area]
+    logging.debug(f"Detected {len(boxes)} cells from {count} components")
+    return [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in _reading_order(boxes)]
+
+
+class Sheet:
+    """A decoded sprite sheet and the cells cut from it.
+
+    The sheet is decoded once into an (H, W, 4) array and view(i) is a
+    zero-copy view of cell i; image(i) makes a PIL image of the cell when it
+    is needed. Usable as the stack of FrameStore.from_mapped. Frames are
+    identified as SheetCell(path, cell index) and layout() records the cell
+    coordinates so assemble() can put (possibly scaled) frames back together.
+    """
+
+    def __init__(self, path, array, cells):
+        self.path = path
+        self.array = array
+        self.cells = list(cells)
+
+    def view(self, i):
+        x, y, w, h = self.cells[i]
+        return self.array[y:y + h, x:x + w]
+
+    def image(self, i):
+        return Image.fromarray(np.ascontiguousarray(self.view(i)), 'RGBA')
+
+    def __len__(self):
+        return len(self.cells)
+
+    def sources(self):
+        return [SheetCell(self.path, i) for i in range(len(self.cells))]
+
+    def layout(self):
+        return {'size': (self.array.shape[1], self.array.shape[0]), 'cells': list(self.cells)}
+
+
+def slice_sheet(path, cell_size=None, transparency_color=None, margin=0, spacing=0, skip_empty=True,
+                merge_gap=1, min_area=4):
+    """Decode a sheet and cut it into cells.
+
+    With cell_size (width, height) the sheet is cut on a regular grid
+    (empty cells are skipped unless skip_empty is False); without it the
+    sprites are found with detect_cells.
+    """
+    with Image.open(path) as img:
+        arr = np.asarray(img.convert('RGBA'))
+    if cell_size:
+        cells = grid_cells(arr.shape[1], arr.shape[0], cell_size[0], cell_size[1], margin, spacing)
+        if skip_empty:
+            mask = foreground_mask(arr, transparency_color)
+            cells = [c for c in cells if mask[c[1]:c[1] + c[3], c[0]:c[0] + c[2]].any()]
+    else:
+        cells = detect_cells(arr, transparency_color, merge_gap, min_area)
+    logging.info(f"Sliced {path} into {len(cells)} cells")
+    return Sheet(path, arr, cells)
+
+
+def assemble(frames, layout, background=None, scale=1.0):
+    """Paste frames back at their cell positions; returns an RGBA (or background-filled RGB) image.
+
+    scale is the factor the frames were resized by since slicing: the sheet
+    and the cell positions are scaled by it (frame sizes were rounded by the
+    scaler, so they can't be used to recover it).
+    """
+    width, height = layout['size']
+    canvas = np.zeros((max(1, round(height * scale)), max(1, round(width * scale)), 4), dtype=np.uint8)
+    for frame, (x, y, _, _) in zip(frames, layout['cells']):
+        cell = np.asarray(frame.convert('RGBA'))
+        top, left = round(y * scale), round(x * scale)
+        region = canvas[top:top + cell.shape[0], left:left + cell.shape[1]]
+        region[...] = cell[:region.shape[0], :region.shape[1]]
+    sheet = Image.fromarray(canvas, 'RGBA')
+    if background is not None:
+        filled = Image.new('RGB', sheet.size, background)
+        filled.paste(sheet, mask=sheet.split()[3])
+        return filled
+    return sheet